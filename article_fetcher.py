@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import http_client
+from concurrent.futures import ProcessPoolExecutor
+from content_metadata import MAX_ARTICLE_BYTES, parse_article_body
+from domain_health import DomainUnavailable
+from instrumentation import record_stage, stage
+
+# Threads downloading article pages
+DEFAULT_IO_WORKERS = 16
+
+# Processes extracting titles and descriptions from downloaded pages
+DEFAULT_PARSE_WORKERS = os.cpu_count() or 1
+
+# Downloaded bodies allowed to wait for a parser before downloads pause
+DEFAULT_QUEUE_SIZE = 32
+
+# Parsers are started from a clean server process rather than forked from this
+# one, whose downloader and warm-up threads may hold sqlite, stdout or metrics locks
+_PARSE_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+_DONE = object()
+
+class MetadataSeen:
+    """Byte-level check of whether a page prefix already holds its title and description
+
+    A cheap stand-in for ArticleMetadataParser.done, used as the
+    downloaders' stop_when so the real parsing stays in the parse pool:
+    once an </h1> and a description source (description meta tag,
+    og:description or a closed paragraph) have streamed past, the rest of
+    the page can't change what the parser picks.
+    """
+
+    DESCRIPTION_MARKERS = (b'name="description"', b"name='description'", b'name=description',
+                           b'og:description', b'</p>')
+    # Bytes carried over between chunks so markers split across them are found
+    OVERLAP = 32
+
+    def __init__(self):
+        self._tail = b''
+        self.title = False
+        self.description = False
+
+    def __call__(self, chunk):
+        text = self._tail + chunk.lower()
+        self.title = self.title or b'</h1>' in text
+        self.description = self.description or any(marker in text for marker in self.DESCRIPTION_MARKERS)
+        self._tail = text[-self.OVERLAP:]
+        return self.title and self.description
+
+def _download(url, timeout):
+    """Fetch a page prefix, up to its title and description
+
+    Returns (url, status, final_url, content, error, seconds taken).
+    """
+    started = time.monotonic()
+    try:
+        response = http_client.fetch(url, kind='article', max_bytes=MAX_ARTICLE_BYTES,
+                                     stop_when=MetadataSeen(), timeout=timeout)
+        return url, response.status_code, response.url or url, response.content, None, time.monotonic() - started
+    except DomainUnavailable as e:
+        return url, None, url, b'', e, time.monotonic() - started
+    except Exception as e:
+        print(f"Error fetching article {url}: {e}")
+        return url, None, url, b'', e, time.monotonic() - started
+
+@stage('fetch')
+def fetch_articles(urls, io_workers=DEFAULT_IO_WORKERS, parse_workers=DEFAULT_PARSE_WORKERS,
+                   queue_size=DEFAULT_QUEUE_SIZE, timeout=15, on_result=None):
+    """Fetch many articles, parsing them in a process pool while downloads continue
+
+    I/O threads download each distinct URL (at most MAX_ARTICLE_BYTES of
+    it, and only up to its title and description, see MetadataSeen) and
+    hand the raw body over a bounded queue; the calling thread
+    feeds those bodies to a ProcessPoolExecutor, keeping at most
+    `queue_size` of them in flight. When parsers fall behind, the queue
+    fills up and the downloaders wait, so memory stays bounded.
+
+    Returns {url: result} with results shaped like content_metadata.fetch_article,
+    whose 'elapsed' is the seconds spent downloading and parsing that URL.
+    on_result(url, result) is called as each article finishes.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+
+    pending_urls = queue.Queue()
+    for url in unique_urls:
+        pending_urls.put(url)
+    io_workers = min(io_workers, len(unique_urls))
+    for _ in range(io_workers):
+        pending_urls.put(_DONE)
+    bodies = queue.Queue(maxsize=queue_size)
+
+    def download_worker():
+        while True:
+            url = pending_urls.get()
+            if url is _DONE:
+                return
+            bodies.put(_download(url, timeout))
+
+    threads = [threading.Thread(target=download_worker, daemon=True) for _ in range(io_workers)]
+    for thread in threads:
+        thread.start()
+
+    results = {}
+    results_lock = threading.Lock()
+    parse_slots = threading.Semaphore(queue_size)
+
+    def finish(url, result):
+        with results_lock:
+            results[url] = result
+        if on_result is not None:
+            on_result(url, result)
+
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=_PARSE_CONTEXT) as pool:
+        for _ in unique_urls:
+            url, status, final_url, content, error, elapsed = bodies.get()
+            result = {'status': status, 'final_url': final_url, 'ok': status is not None and status < 400,
+                      'metadata': None, 'error': error, 'skipped': isinstance(error, DomainUnavailable),
+                      'elapsed': elapsed}
+            if status != 200:
+                finish(url, result)
+                continue
+
+            parse_slots.acquire()
+            future = pool.submit(parse_article_body, content)
+
+            def parsed(future, url=url, result=result):
+                parse_slots.release()
+                try:
+                    result['metadata'], parse_seconds = future.result()
+                    result['elapsed'] += parse_seconds
+                    record_stage('parse', parse_seconds)
+                except Exception as e:
+                    print(f"Error parsing article {url}: {e}")
+                finish(url, result)
+
+            future.add_done_callback(parsed)
+
+    for thread in threads:
+        thread.join()
+    return results
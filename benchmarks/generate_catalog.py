@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Generate synthetic ContentData.json catalogs of any size for benchmarking"""
+import argparse
+import json
+import random
+import string
+import uuid
+
+EMOTIONS = ['happy', 'sad', 'angry', 'scared', 'romantic', 'relaxed', 'lost', 'stressed', 'sleepy']
+
+CONTENT_TYPES = ['video', 'song', 'article', 'quote']
+
+# Article hosts, weighted roughly like the real catalog
+ARTICLE_HOSTS = [
+    'www.mayoclinic.org', 'www.verywellmind.com', 'www.psychologytoday.com', 'www.health.harvard.edu',
+    'greatergood.berkeley.edu', 'www.mind.org.uk', 'www.webmd.com', 'www.healthline.com',
+    'positivepsychology.com', 'www.helpguide.org', 'www.nimh.nih.gov', 'www.sleepfoundation.org',
+]
+
+# Fraction of items that reuse an earlier URL of the same type
+DEFAULT_DUPLICATE_RATE = 0.02
+
+def _token(rng, length, alphabet=string.ascii_letters + string.digits):
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+def _new_url(rng, content_type, n):
+    if content_type == 'video':
+        return f"https://www.youtube.com/watch?v={_token(rng, 11, string.ascii_letters + string.digits + '-_')}"
+    if content_type == 'song':
+        return f"https://open.spotify.com/track/{_token(rng, 22)}"
+    if content_type == 'article':
+        return f"https://{rng.choice(ARTICLE_HOSTS)}/articles/{n}-{_token(rng, 8).lower()}/"
+    return f"https://www.goodreads.com/quotes/{n}"
+
+def generate_catalog(size, seed=0, duplicate_rate=DEFAULT_DUPLICATE_RATE):
+    """Return `size` catalog items spread evenly over emotions and content types"""
+    rng = random.Random(seed)
+    urls_by_type = {content_type: [] for content_type in CONTENT_TYPES}
+    items = []
+
+    for n in range(size):
+        content_type = CONTENT_TYPES[n % len(CONTENT_TYPES)]
+        emotion = EMOTIONS[(n // len(CONTENT_TYPES)) % len(EMOTIONS)]
+        seen = urls_by_type[content_type]
+        if seen and content_type != 'quote' and rng.random() < duplicate_rate:
+            url = rng.choice(seen)
+        else:
+            url = _new_url(rng, content_type, n)
+            seen.append(url)
+
+        item = {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'title': f"Synthetic {content_type} {n}",
+            'description': f"A synthetic {content_type} suggestion for your {emotion} mood.",
+            'url': url,
+            'type': content_type,
+            'emotion': emotion,
+        }
+        if content_type == 'song':
+            item['artist'] = 'Mock Artist'
+        items.append(item)
+    return items
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic ContentData.json")
+    parser.add_argument('size', type=int, help="number of catalog items")
+    parser.add_argument('output', help="path of the catalog file to write")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-rate', type=float, default=DEFAULT_DUPLICATE_RATE)
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as f:
+        json.dump(generate_catalog(args.size, seed=args.seed, duplicate_rate=args.duplicate_rate), f, indent=4)
+    print(f"Wrote {args.size} items to {args.output}")
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Local HTTP server that imitates the content sites the maintenance scripts talk to
+
+Requests arrive as /<original host><original path>?<original query> (see
+run_script.py, which rewrites every outgoing URL that way) and are
+answered with synthetic YouTube and Spotify oEmbed JSON, Spotify og:meta
+pages or article HTML. Whether a URL is broken or redirected is derived
+from a hash of the URL, so every run sees the same catalog health.
+"""
+import argparse
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# Query parameter used to walk a redirect chain
+HOP_PARAM = '_hop'
+
+# Filler paragraphs appended to article pages to give them a realistic size
+ARTICLE_PARAGRAPH = ("<p>Researchers have found that small daily habits shape how we feel "
+                     "far more than we expect, and that noticing them is the first step.</p>\n")
+
+def _fraction(key):
+    """Map a string to a stable number in [0, 1)"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+class MockContentHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        config = self.server.config
+        delay = config['latency'] * (1 + config['jitter'] * (2 * random.random() - 1))
+        if delay > 0:
+            time.sleep(delay)
+
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        query = parse_qs(parts.query)
+        hop = int(query.pop(HOP_PARAM, ['0'])[0])
+        # The identity of the original URL, without the redirect bookkeeping
+        key = f"{host}{path}?{urlencode(query, doseq=True)}"
+
+        if _fraction('error:' + key) < config['error_rate']:
+            return self._send(404, 'text/html', b'<html><body><h1>Not Found</h1></body></html>', send_body)
+
+        if path == '/oembed' and 'spotify.com' in host:
+            track_url = query.get('url', [''])[0]
+            track_id = urlsplit(track_url).path.rstrip('/').split('/')[-1]
+            body = json.dumps({'title': f"Synthetic song {track_id}", 'provider_name': 'Spotify', 'type': 'rich'})
+            return self._send(200, 'application/json', body.encode('utf-8'), send_body)
+
+        if path == '/oembed':
+            video_url = query.get('url', [''])[0]
+            video_id = parse_qs(urlsplit(video_url).query).get('v', [''])[0]
+            body = json.dumps({'title': f"Synthetic video {video_id}", 'author_name': 'Mock Channel'})
+            return self._send(200, 'application/json', body.encode('utf-8'), send_body)
+
+        if 'spotify.com' in host:
+            track_id = path.rstrip('/').split('/')[-1]
+            body = (f'<html><head><meta property="og:title" content="Synthetic song {track_id}">'
+                    f'<meta property="og:description" content="Mock Artist · Song · 2020"></head>'
+                    f'<body></body></html>')
+            return self._send(200, 'text/html; charset=utf-8', body.encode('utf-8'), send_body)
+
+        if 'youtube.com' in host:
+            return self._send(200, 'text/html; charset=utf-8', b'<html><body>video</body></html>', send_body)
+
+        if hop < config['redirect_hops'] and _fraction('redirect:' + key) < config['redirect_rate']:
+            query[HOP_PARAM] = [str(hop + 1)]
+            # Relative, so the client keeps talking to this server
+            self.send_response(302)
+            self.send_header('Location', f"/{host}{path}?{urlencode(query, doseq=True)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        title = f"Synthetic article {path.strip('/') or host}"
+        filler = ARTICLE_PARAGRAPH * max(1, config['article_bytes'] // len(ARTICLE_PARAGRAPH))
+        body = (f'<html><head><title>{title}</title>'
+                f'<meta name="description" content="A synthetic article about feelings. It is served locally.">'
+                f'</head><body>{filler[:len(filler) // 10]}<h1>{title}</h1>{filler}</body></html>')
+        return self._send(200, 'text/html; charset=utf-8', body.encode('utf-8'), send_body)
+
+    def _send(self, status, content_type, body, send_body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            try:
+                self.wfile.write(body)
+            except ConnectionError:
+                # Clients that stop reading early (bounded article fetches) hang up mid-body
+                pass
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing keep-alive connections are routine here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class MockContentServer:
+    """Runs the mock content server on a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.02, jitter=0.5, error_rate=0.05,
+                 redirect_rate=0.1, redirect_hops=2, article_bytes=100 * 1024):
+        self.config = {
+            'latency': latency,
+            'jitter': jitter,
+            'error_rate': error_rate,
+            'redirect_rate': redirect_rate,
+            'redirect_hops': redirect_hops,
+            'article_bytes': article_bytes,
+        }
+        self._server = _QuietServer((host, port), MockContentHandler)
+        self._server.config = self.config
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+def add_server_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.02,
+                        help="seconds the server waits before answering each request")
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help="random +/- fraction applied to the latency")
+    parser.add_argument('--error-rate', type=float, default=0.05,
+                        help="fraction of URLs that answer 404")
+    parser.add_argument('--redirect-rate', type=float, default=0.1,
+                        help="fraction of article URLs that redirect before answering")
+    parser.add_argument('--redirect-hops', type=int, default=2,
+                        help="length of each redirect chain")
+    parser.add_argument('--article-kb', type=int, default=100,
+                        help="approximate size of each article page in KB")
+
+def server_from_args(args, port=0):
+    return MockContentServer(port=port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                             redirect_rate=args.redirect_rate, redirect_hops=args.redirect_hops,
+                             article_bytes=args.article_kb * 1024)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic content for the maintenance script benchmarks")
+    parser.add_argument('--port', type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, port=args.port).start()
+    print(f"Mock content server listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Benchmark the maintenance scripts against the local mock content server
+
+For every catalog size and script, a synthetic catalog is written into a
+fresh working directory (so each run starts with a cold response cache and
+job journal) and the script is run there through run_script.py. Wall time,
+throughput, request latency percentiles and peak memory are printed and
+saved as JSON under benchmarks/results/, tagged with the current commit so
+runs can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from generate_catalog import generate_catalog
+from mock_server import add_server_arguments, server_from_args
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# Script name -> extra command line arguments
+SCRIPTS = {
+    'check_urls.py': [],
+    'check_youtube_videos.py': [],
+    'fix_broken_article_links.py': [],
+    'update_content_metadata.py': [],
+}
+
+DEFAULT_SIZES = [360, 10000, 100000]
+
+# Rate limits are scaled by this much so per-host politeness doesn't dominate the timings
+DEFAULT_RATE_MULTIPLIER = 100.0
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers, or None if it's empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_one(script, size, base_url, rate_multiplier, seed):
+    """Run a script over a fresh synthetic catalog and return its measurements"""
+    with tempfile.TemporaryDirectory(prefix='sentimentsync-bench-') as workdir:
+        catalog_dir = os.path.join(workdir, 'SentimentSync', 'Resources')
+        os.makedirs(catalog_dir)
+        with open(os.path.join(catalog_dir, 'ContentData.json'), 'w') as f:
+            json.dump(generate_catalog(size, seed=seed), f, indent=4)
+
+        trace_path = os.path.join(workdir, 'trace.json')
+        env = dict(os.environ, BENCH_SERVER=base_url, BENCH_TRACE=trace_path,
+                   BENCH_RATE_MULTIPLIER=str(rate_multiplier))
+        command = [sys.executable, os.path.join(BENCH_DIR, 'run_script.py'), script] + SCRIPTS[script]
+
+        with open(os.path.join(workdir, 'output.log'), 'w+') as log:
+            started = time.perf_counter()
+            process = subprocess.Popen(command, cwd=workdir, env=env, stdin=subprocess.PIPE,
+                                       stdout=log, stderr=subprocess.STDOUT)
+            # check_urls asks before writing its replacements
+            process.stdin.write(b'y\n')
+            process.stdin.close()
+            _, status, usage = os.wait4(process.pid, 0)
+            elapsed = time.perf_counter() - started
+            exit_code = process.returncode = os.waitstatus_to_exitcode(status)
+            if exit_code != 0:
+                log.seek(0)
+                print(log.read()[-2000:], file=sys.stderr)
+
+        latencies = []
+        if os.path.exists(trace_path):
+            with open(trace_path) as f:
+                latencies = json.load(f)['latencies']
+
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    p50 = percentile(latencies, 0.50)
+    p95 = percentile(latencies, 0.95)
+    return {
+        'script': script,
+        'size': size,
+        'exit_code': exit_code,
+        'wall_seconds': round(elapsed, 3),
+        'items_per_second': round(size / elapsed, 2),
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 2),
+        'latency_p50_ms': round(p50 * 1000, 2) if p50 is not None else None,
+        'latency_p95_ms': round(p95 * 1000, 2) if p95 is not None else None,
+        'peak_rss_mb': round(peak_rss / (1024 * 1024), 1),
+    }
+
+def compare(previous_path, results):
+    """Print how each result moved relative to an earlier results file"""
+    with open(previous_path) as f:
+        previous = {(r['script'], r['size']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:")
+    for result in results:
+        before = previous.get((result['script'], result['size']))
+        if not before:
+            continue
+        speedup = before['wall_seconds'] / result['wall_seconds'] if result['wall_seconds'] else 0
+        print(f"  {result['script']:<30} {result['size']:>7}  {speedup:5.2f}x speed  "
+              f"{before['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the maintenance scripts against a mock content server")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated catalog sizes")
+    parser.add_argument('--scripts', default=','.join(SCRIPTS),
+                        help="comma-separated scripts to run")
+    parser.add_argument('--rate-multiplier', type=float, default=DEFAULT_RATE_MULTIPLIER,
+                        help="factor applied to every per-host rate limit")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic catalogs")
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    scripts = [script.strip() for script in args.scripts.split(',') if script.strip()]
+    unknown = set(scripts) - set(SCRIPTS)
+    if unknown:
+        parser.error(f"unknown scripts: {', '.join(sorted(unknown))}")
+
+    results = []
+    with server_from_args(args) as server:
+        for size in sizes:
+            for script in scripts:
+                print(f"Running {script} on {size} items...", flush=True)
+                result = run_one(script, size, server.base_url, args.rate_multiplier, args.seed)
+                results.append(result)
+                print(f"  {result['wall_seconds']}s, {result['items_per_second']} items/s, "
+                      f"{result['requests']} requests (p50 {result['latency_p50_ms']} ms, "
+                      f"p95 {result['latency_p95_ms']} ms), peak {result['peak_rss_mb']} MB"
+                      + (f", exit code {result['exit_code']}" if result['exit_code'] else ''))
+
+    commit = current_commit()
+    report = {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'server': server.config,
+        'rate_multiplier': args.rate_multiplier,
+        'results': results,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{(commit or 'unknown')[:8]}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nSaved results to {output}")
+
+    if args.compare:
+        compare(args.compare, results)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Run one maintenance script with its HTTP traffic sent to the mock content server
+
+Usage: run_script.py SCRIPT [ARGS...], with BENCH_SERVER set to the mock
+server's base URL and BENCH_TRACE to a file that receives the latency of
+every request as JSON when the script exits. Rate limits are multiplied by
+BENCH_RATE_MULTIPLIER (default 1) so politeness delays don't hide the
+scripts' own cost.
+"""
+import json
+import os
+import runpy
+import sys
+import time
+from urllib.parse import urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import http_client
+import rate_limiter
+
+def mock_url(base_url, url):
+    """Map https://host/path?query to <base_url>/host/path?query"""
+    parts = urlsplit(url)
+    mapped = f"{base_url}/{parts.netloc}{parts.path}"
+    return f"{mapped}?{parts.query}" if parts.query else mapped
+
+def install(base_url, latencies, rate_multiplier=1.0):
+    """Point the shared HTTP session at the mock server and time every request"""
+    build_session = http_client.build_session
+
+    def build_mock_session(*args, **kwargs):
+        session = build_session(*args, **kwargs)
+        send = session.request
+
+        def request(method, url, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return send(method, mock_url(base_url, url), *args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+
+        session.request = request
+        return session
+
+    http_client.build_session = build_mock_session
+
+    # Rate limits are still keyed on the original hosts, just scaled up
+    rate_limiter._default_limiter = rate_limiter.RateLimiter(
+        domain_rates={host: (rate * rate_multiplier, max(1, int(burst * rate_multiplier)))
+                      for host, (rate, burst) in rate_limiter.DOMAIN_RATES.items()},
+        default_rate=rate_limiter.DEFAULT_RATE * rate_multiplier,
+        default_burst=max(1, int(rate_limiter.DEFAULT_BURST * rate_multiplier))
+    )
+
+def main():
+    script = sys.argv[1]
+    latencies = []
+    install(os.environ['BENCH_SERVER'], latencies, float(os.environ.get('BENCH_RATE_MULTIPLIER', '1')))
+
+    sys.argv = [script] + sys.argv[2:]
+    try:
+        runpy.run_path(os.path.join(REPO_ROOT, script), run_name='__main__')
+    finally:
+        with open(os.environ['BENCH_TRACE'], 'w') as f:
+            json.dump({'latencies': latencies}, f)
+
+if __name__ == "__main__":
+    main()
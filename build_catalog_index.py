@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import struct
+import uuid
+from catalog_io import atomic_file, load_catalog
+
+JSON_FILE_PATH = "SentimentSync/Resources/ContentData.json"
+DEFAULT_JSON_INDEX_PATH = "SentimentSync/Resources/ContentIndex.json"
+DEFAULT_BINARY_INDEX_PATH = "SentimentSync/Resources/ContentIndex.bin"
+
+INDEX_VERSION = 1
+
+# Binary layout, all little-endian:
+#   header:  magic, version, emotion count, type count, slice count, item count, string count
+#   names:   emotion then type names, each a u16 length and UTF-8 bytes
+#   slices:  (emotion index u8, type index u8, first item u32, item count u32) per slice
+#   items:   (16-byte UUID, title u32, description u32, url u32) per item, grouped by slice
+#   strings: u32 end offset per string, then the concatenated UTF-8 bytes
+BINARY_MAGIC = b'SSIX'
+HEADER = struct.Struct('<4sHHHIII')
+SLICE = struct.Struct('<BBII')
+ITEM = struct.Struct('<16sIII')
+NAME_LENGTH = struct.Struct('<H')
+OFFSET = struct.Struct('<I')
+
+# Item fields stored as interned strings, in record order
+STRING_FIELDS = ('title', 'description', 'url')
+
+def build_index(content_data):
+    """Group the catalog by (emotion, type) and intern its strings
+
+    Returns a dict with the emotion and type names (in order of first
+    appearance), one slice per (emotion, type) pair with the range of its
+    items, the items as [id, title, description, url] with the strings
+    replaced by indexes into a shared, de-duplicated string table.
+    """
+    emotions = list(dict.fromkeys(item['emotion'] for item in content_data))
+    types = list(dict.fromkeys(item['type'] for item in content_data))
+
+    groups = {}
+    for item in content_data:
+        groups.setdefault((item['emotion'], item['type']), []).append(item)
+
+    strings = []
+    string_ids = {}
+
+    def intern(value):
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value)
+        return string_ids[value]
+
+    slices = []
+    items = []
+    for emotion in emotions:
+        for content_type in types:
+            group = groups.get((emotion, content_type))
+            if not group:
+                continue
+            slices.append([emotions.index(emotion), types.index(content_type), len(items), len(group)])
+            for item in group:
+                items.append([item['id']] + [intern(item.get(field) or '') for field in STRING_FIELDS])
+
+    return {
+        'version': INDEX_VERSION,
+        'emotions': emotions,
+        'types': types,
+        'fields': ['id'] + list(STRING_FIELDS),
+        'slices': slices,
+        'items': items,
+        'strings': strings,
+    }
+
+def write_json_index(index, path=DEFAULT_JSON_INDEX_PATH):
+    """Atomically write the index as minified JSON"""
+    with atomic_file(path) as f:
+        json.dump(index, f, separators=(',', ':'), ensure_ascii=False)
+
+def write_binary_index(index, path=DEFAULT_BINARY_INDEX_PATH):
+    """Atomically write the index in the fixed-width binary layout described above"""
+    encoded = [value.encode('utf-8') for value in index['strings']]
+    with atomic_file(path, 'wb') as f:
+        f.write(HEADER.pack(BINARY_MAGIC, index['version'], len(index['emotions']), len(index['types']),
+                            len(index['slices']), len(index['items']), len(encoded)))
+        for name in index['emotions'] + index['types']:
+            data = name.encode('utf-8')
+            f.write(NAME_LENGTH.pack(len(data)) + data)
+        for emotion, content_type, first, count in index['slices']:
+            f.write(SLICE.pack(emotion, content_type, first, count))
+        for item_id, *fields in index['items']:
+            f.write(ITEM.pack(uuid.UUID(item_id).bytes, *fields))
+        end = 0
+        for data in encoded:
+            end += len(data)
+            f.write(OFFSET.pack(end))
+        for data in encoded:
+            f.write(data)
+
+def read_binary_index(path, emotion, content_type):
+    """Decode just one (emotion, type) slice of a binary index into catalog items
+
+    This is how the app is meant to read the file: header, slice table,
+    the slice's fixed-width records and only the strings they point at.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, emotion_count, type_count, slice_count, item_count, string_count = HEADER.unpack_from(data, 0)
+    if magic != BINARY_MAGIC or version != INDEX_VERSION:
+        raise ValueError(f"{path} is not a version {INDEX_VERSION} catalog index")
+
+    pos = HEADER.size
+    names = []
+    for _ in range(emotion_count + type_count):
+        (length,) = NAME_LENGTH.unpack_from(data, pos)
+        pos += NAME_LENGTH.size
+        names.append(data[pos:pos + length].decode('utf-8'))
+        pos += length
+    emotions, types = names[:emotion_count], names[emotion_count:]
+
+    slices_start = pos
+    items_start = slices_start + slice_count * SLICE.size
+    offsets_start = items_start + item_count * ITEM.size
+    blob_start = offsets_start + string_count * OFFSET.size
+
+    def string(i):
+        start = OFFSET.unpack_from(data, offsets_start + (i - 1) * OFFSET.size)[0] if i else 0
+        end = OFFSET.unpack_from(data, offsets_start + i * OFFSET.size)[0]
+        return data[blob_start + start:blob_start + end].decode('utf-8')
+
+    for n in range(slice_count):
+        emotion_index, type_index, first, count = SLICE.unpack_from(data, slices_start + n * SLICE.size)
+        if emotions[emotion_index] != emotion or types[type_index] != content_type:
+            continue
+        items = []
+        for i in range(first, first + count):
+            item_id, *fields = ITEM.unpack_from(data, items_start + i * ITEM.size)
+            item = {'id': str(uuid.UUID(bytes=item_id))}
+            item.update(zip(STRING_FIELDS, (string(field) for field in fields)))
+            item.update(type=content_type, emotion=emotion)
+            items.append(item)
+        return items
+    return []
+
+def build_catalog_index(json_file_path=JSON_FILE_PATH, json_path=DEFAULT_JSON_INDEX_PATH,
+                        binary_path=DEFAULT_BINARY_INDEX_PATH):
+    """Build the index from the catalog and write the requested formats"""
+    content_data = load_catalog(json_file_path)
+    index = build_index(content_data)
+    if json_path:
+        write_json_index(index, json_path)
+        print(f"Wrote JSON index to {json_path}")
+    if binary_path:
+        write_binary_index(index, binary_path)
+        print(f"Wrote binary index to {binary_path}")
+    print(f"Indexed {len(index['items'])} items in {len(index['slices'])} emotion/type slices "
+          f"({len(index['strings'])} distinct strings)")
+    return index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a precomputed per-emotion/per-type index of ContentData.json")
+    parser.add_argument('--format', choices=['json', 'binary', 'both'], default='both',
+                        help="index layout(s) to write")
+    parser.add_argument('--json-output', default=DEFAULT_JSON_INDEX_PATH)
+    parser.add_argument('--binary-output', default=DEFAULT_BINARY_INDEX_PATH)
+    args = parser.parse_args()
+
+    build_catalog_index(
+        json_path=args.json_output if args.format in ('json', 'both') else None,
+        binary_path=args.binary_output if args.format in ('binary', 'both') else None
+    )
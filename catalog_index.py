@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+from collections import defaultdict
+from instrumentation import stage
+from url_canonical import fingerprint
+
+class CatalogIndex:
+    """Lookups over a loaded catalog that stay current as URLs are replaced
+
+    Keeps fingerprint -> item IDs, (emotion, type) -> items and the set of
+    fingerprints in use. URLs are compared by canonical identity (see
+    url_canonical), so youtu.be/ID and youtube.com/watch?v=ID&t=3 are the
+    same URL, and checking whether a candidate is taken is a set lookup
+    instead of a scan over the whole catalog.
+    """
+
+    def __init__(self, content_data):
+        self.items_by_id = {}
+        # Dicts are used as insertion-ordered sets so groups keep catalog order
+        self.ids_by_fingerprint = defaultdict(dict)
+        self.items_by_group = defaultdict(list)
+        self.used_fingerprints = set()
+
+        for item in content_data:
+            self.add(item)
+
+    def add(self, item):
+        """Index an item that was appended to the catalog"""
+        self.items_by_id[item['id']] = item
+        self.items_by_group[(item['emotion'], item['type'])].append(item)
+        self._link(fingerprint(item['url']), item['id'])
+
+    def _link(self, key, item_id):
+        self.ids_by_fingerprint[key][item_id] = None
+        self.used_fingerprints.add(key)
+
+    def _unlink(self, key, item_id):
+        ids = self.ids_by_fingerprint.get(key)
+        if ids is None:
+            return
+        ids.pop(item_id, None)
+        if not ids:
+            del self.ids_by_fingerprint[key]
+            self.used_fingerprints.discard(key)
+
+    def is_used(self, url):
+        return fingerprint(url) in self.used_fingerprints
+
+    def items_with_url(self, url):
+        """Return every item whose URL has the same canonical identity"""
+        return [self.items_by_id[item_id] for item_id in self.ids_by_fingerprint.get(fingerprint(url), ())]
+
+    def items_for(self, emotion, content_type):
+        return self.items_by_group.get((emotion, content_type), [])
+
+    def first_unused(self, candidates):
+        """Return the first candidate URL not used by any item, or None"""
+        for url in candidates:
+            if not self.is_used(url):
+                return url
+        return None
+
+    @stage('dedup')
+    def duplicate_urls(self, types=None):
+        """Return {url: [items]} for URLs shared by more than one item, in catalog order
+
+        Each group is keyed by the URL of its first item.
+        """
+        duplicates = {}
+        for ids in self.ids_by_fingerprint.values():
+            items = [self.items_by_id[item_id] for item_id in ids]
+            if types is not None:
+                items = [item for item in items if item['type'] in types]
+            if len(items) > 1:
+                duplicates[items[0]['url']] = items
+        return duplicates
+
+    def set_url(self, item, new_url):
+        """Point an item at a new URL and update the index to match"""
+        self._unlink(fingerprint(item['url']), item['id'])
+        item['url'] = new_url
+        self._link(fingerprint(new_url), item['id'])
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import contextlib
+import json
+import os
+import stat
+import tempfile
+import time
+from instrumentation import stage
+
+# Bytes read from disk at a time when streaming a JSON array
+CHUNK_SIZE = 64 * 1024
+
+# Seconds between checkpoint rewrites of the catalog
+DEFAULT_CHECKPOINT_INTERVAL = 60
+
+_WHITESPACE = ' \t\r\n'
+
+def is_jsonl(path):
+    return path.endswith('.jsonl')
+
+def replacement_mode(path):
+    """Return the permission bits for a file about to replace `path`
+
+    Keeps the mode of the existing file, or uses the umask default for a new one.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+@contextlib.contextmanager
+def atomic_file(path, mode='w'):
+    """Open a temp file next to `path` that replaces it atomically when the block succeeds
+
+    The temp file gets the mode of the file it replaces and is fsynced
+    first; if the block raises, `path` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix='.tmp')
+    try:
+        os.fchmod(fd, replacement_mode(path))
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _iter_json_array(f, chunk_size=CHUNK_SIZE):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators, reading more when the buffer runs dry
+        while pos < len(buffer) and (buffer[pos] in _WHITESPACE or (started and buffer[pos] == ',')):
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of catalog file")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("Catalog file must contain a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The next item straddles the chunk boundary; read more and retry
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+def iter_items(path):
+    """Yield catalog items one at a time without loading the whole file"""
+    with open(path, 'r') as f:
+        if is_jsonl(path):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+@stage('load')
+def load_catalog(path):
+    """Load every catalog item into a list"""
+    return list(iter_items(path))
+
+class CatalogWriter:
+    """Streams items into a temp file and atomically replaces the catalog on close
+
+    The output matches json.dump(items, f, indent=4) byte for byte, or one
+    compact item per line for .jsonl paths. If the block raises, the
+    original file is left untouched.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._temp_path = None
+        self._discarded = False
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, prefix='.catalog-', suffix='.tmp')
+        # mkstemp creates the file 0600; the catalog keeps its own mode
+        os.fchmod(fd, replacement_mode(self.path))
+        self._file = os.fdopen(fd, 'w')
+        return self
+
+    def write(self, item):
+        if is_jsonl(self.path):
+            self._file.write(json.dumps(item) + '\n')
+        else:
+            prefix = '[\n' if self.count == 0 else ',\n'
+            body = json.dumps(item, indent=4).replace('\n', '\n    ')
+            self._file.write(f"{prefix}    {body}")
+        self.count += 1
+
+    def discard(self):
+        """Leave the original catalog in place when the block ends, e.g. if nothing changed"""
+        self._discarded = True
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if not is_jsonl(self.path):
+                    self._file.write('\n]' if self.count else '[]')
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._file.close()
+            if exc_type is None and not self._discarded:
+                os.replace(self._temp_path, self.path)
+        finally:
+            if os.path.exists(self._temp_path):
+                os.remove(self._temp_path)
+        return False
+
+@stage('write')
+def write_catalog(path, items):
+    """Atomically write an iterable of items to the catalog; returns the count"""
+    with CatalogWriter(path) as writer:
+        for item in items:
+            writer.write(item)
+    return writer.count
+
+@stage('write')
+def update_catalog(path, changes):
+    """Stream the catalog through, updating items by ID, and atomically replace it
+
+    `changes` maps item IDs to {field: new value}. Returns the number of
+    items updated.
+    """
+    updated = 0
+    with CatalogWriter(path) as writer:
+        for item in iter_items(path):
+            if item['id'] in changes:
+                item.update(changes[item['id']])
+                updated += 1
+            writer.write(item)
+    return updated
+
+def url_entry(item, content_type):
+    """Return the fields needed to check and replace an item's URL, leaving out the rest
+
+    Items of `content_type`, the ones that may be replaced, keep their
+    title and description as well.
+    """
+    fields = ['id', 'emotion', 'type', 'url']
+    if item['type'] == content_type:
+        fields += ['title', 'description']
+    return {field: item[field] for field in fields}
+
+class Checkpointer:
+    """Rewrites an in-memory catalog to disk at most every `interval` seconds
+
+    A crash then loses at most `interval` seconds of work instead of the
+    whole run, while the number of full rewrites stays bounded however
+    large the catalog is. With interval=None the catalog is only written
+    by flush(), for scripts whose job journal already makes them
+    resumable. `write`, if given, replaces write_catalog(path, items) as
+    the way the items are saved (e.g. to catalog shards).
+    """
+
+    def __init__(self, path, content_data, interval=DEFAULT_CHECKPOINT_INTERVAL, write=None):
+        self.path = path
+        self.content_data = content_data
+        self.interval = interval
+        self.write = write or (lambda items: write_catalog(path, items))
+        self.last_write = time.monotonic()
+        self.dirty = False
+
+    def tick(self, changed=False):
+        """Record one processed item, and whether it modified the catalog"""
+        self.dirty = self.dirty or changed
+        if self.dirty and self.interval is not None and time.monotonic() - self.last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Write the catalog now if anything changed since the last write"""
+        if self.dirty:
+            self.write(self.content_data)
+            self.dirty = False
+        self.last_write = time.monotonic()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+from catalog_io import CatalogWriter, iter_items, replacement_mode, write_catalog
+from instrumentation import stage
+
+JSON_FILE_PATH = "SentimentSync/Resources/ContentData.json"
+DEFAULT_SHARD_DIR = "ContentShards"
+MANIFEST_NAME = "manifest.json"
+
+MANIFEST_VERSION = 1
+
+def shard_key(item):
+    return item['emotion'], item['type']
+
+def shard_file_name(emotion, content_type):
+    return f"{emotion}-{content_type}.json"
+
+class ShardedCatalog:
+    """A catalog stored as one file per (emotion, type) plus a manifest
+
+    The manifest lists the shards with their item counts and records the
+    merged catalog order as runs of [shard number, item count], so
+    merging the shards reproduces ContentData.json exactly. Loading and
+    writing touch only the shards a tool asks for.
+    """
+
+    def __init__(self, shard_dir=DEFAULT_SHARD_DIR):
+        self.shard_dir = shard_dir
+        manifest_path = os.path.join(shard_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No shard manifest at {manifest_path}; run `catalog_shards.py split` first")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported shard manifest version in {manifest_path}")
+
+    @property
+    def shards(self):
+        return self.manifest['shards']
+
+    def _path(self, shard):
+        return os.path.join(self.shard_dir, shard['file'])
+
+    def select(self, emotions=None, types=None):
+        """Return the manifest entries of the shards matching the filters"""
+        return [shard for shard in self.shards
+                if (emotions is None or shard['emotion'] in emotions)
+                and (types is None or shard['type'] in types)]
+
+    def load(self, emotions=None, types=None):
+        """Load the items of the matching shards, in merged catalog order"""
+        selected = {id(shard) for shard in self.select(emotions, types)}
+        loaded = {}
+        items = []
+        for number, count in self.manifest['order']:
+            shard = self.shards[number]
+            if id(shard) not in selected:
+                continue
+            if number not in loaded:
+                loaded[number] = iter_items(self._path(shard))
+            items.extend(next(loaded[number]) for _ in range(count))
+        return items
+
+    @stage('write')
+    def write(self, items, emotions=None, types=None):
+        """Rewrite the matching shards so they hold exactly `items`
+
+        `items` should be what load() returned for the same filters, edited
+        in place. Shards are replaced atomically; only their counts (and,
+        when a shard grows or shrinks, the merge order) change in the
+        manifest.
+        """
+        groups = {}
+        for item in items:
+            groups.setdefault(shard_key(item), []).append(item)
+
+        selected = self.select(emotions, types)
+        known = {(shard['emotion'], shard['type']) for shard in self.shards}
+        for key in groups:
+            if key not in known:
+                self._add_shard(*key)
+                selected.append(self.shards[-1])
+        for shard in selected:
+            group = groups.get((shard['emotion'], shard['type']), [])
+            write_catalog(self._path(shard), group)
+            self._resize(self.shards.index(shard), len(group))
+        self._save_manifest()
+
+    def _add_shard(self, emotion, content_type):
+        self.shards.append({'emotion': emotion, 'type': content_type,
+                            'file': shard_file_name(emotion, content_type), 'count': 0})
+
+    def _resize(self, number, count):
+        """Make the merge order hold `count` items of a shard, adding or dropping at its end"""
+        order = self.manifest['order']
+        delta = count - self.shards[number]['count']
+        self.shards[number]['count'] = count
+        if delta > 0:
+            if order and order[-1][0] == number:
+                order[-1][1] += delta
+            else:
+                order.append([number, delta])
+        while delta < 0:
+            i = max(i for i, (n, _) in enumerate(order) if n == number)
+            take = min(order[i][1], -delta)
+            order[i][1] -= take
+            delta += take
+            if not order[i][1]:
+                del order[i]
+
+    def _save_manifest(self):
+        write_manifest(self.shard_dir, self.manifest)
+
+    def iter_merged(self):
+        """Yield every item in merged catalog order, one shard file open at a time per shard"""
+        readers = {}
+        for number, count in self.manifest['order']:
+            if number not in readers:
+                readers[number] = iter_items(self._path(self.shards[number]))
+            for _ in range(count):
+                yield next(readers[number])
+
+def write_manifest(shard_dir, manifest):
+    path = os.path.join(shard_dir, MANIFEST_NAME)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    os.chmod(temp_path, replacement_mode(path))
+    os.replace(temp_path, path)
+
+def split_catalog(json_file_path=JSON_FILE_PATH, shard_dir=DEFAULT_SHARD_DIR):
+    """Split a catalog into per-(emotion, type) shards and write their manifest"""
+    os.makedirs(shard_dir, exist_ok=True)
+    shards = []
+    numbers = {}
+    groups = []
+    order = []
+    for item in iter_items(json_file_path):
+        key = shard_key(item)
+        if key not in numbers:
+            numbers[key] = len(shards)
+            shards.append({'emotion': key[0], 'type': key[1], 'file': shard_file_name(*key), 'count': 0})
+            groups.append([])
+        number = numbers[key]
+        shards[number]['count'] += 1
+        groups[number].append(item)
+        if order and order[-1][0] == number:
+            order[-1][1] += 1
+        else:
+            order.append([number, 1])
+
+    for shard, group in zip(shards, groups):
+        write_catalog(os.path.join(shard_dir, shard['file']), group)
+    write_manifest(shard_dir, {'version': MANIFEST_VERSION, 'shards': shards, 'order': order})
+    print(f"Split {sum(s['count'] for s in shards)} items into {len(shards)} shards in {shard_dir}")
+
+def merge_shards(shard_dir=DEFAULT_SHARD_DIR, json_file_path=JSON_FILE_PATH):
+    """Write the shards back into a single catalog file, in the recorded order"""
+    catalog = ShardedCatalog(shard_dir)
+    with CatalogWriter(json_file_path) as writer:
+        for item in catalog.iter_merged():
+            writer.write(item)
+    print(f"Merged {writer.count} items from {len(catalog.shards)} shards into {json_file_path}")
+
+def add_shards_argument(parser):
+    parser.add_argument('--shards', nargs='?', const=DEFAULT_SHARD_DIR, metavar='DIR',
+                        help=f"read and write the sharded catalog (default dir: {DEFAULT_SHARD_DIR}) "
+                             "instead of ContentData.json")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split ContentData.json into per-emotion/type shards, or merge them back")
+    parser.add_argument('command', choices=['split', 'merge'])
+    parser.add_argument('--shard-dir', default=DEFAULT_SHARD_DIR)
+    parser.add_argument('--catalog', default=JSON_FILE_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'split':
+        split_catalog(args.catalog, args.shard_dir)
+    else:
+        merge_shards(args.shard_dir, args.catalog)
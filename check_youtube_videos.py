@@ -1,237 +1,160 @@
 #!/usr/bin/env python3
-import json
-import requests
-import re
-import time
+import argparse
+import http_client
+from catalog_index import CatalogIndex
+from catalog_io import iter_items, update_catalog, url_entry
+from catalog_shards import ShardedCatalog, add_shards_argument
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from domain_health import DomainUnavailable
+from instrumentation import add_metrics_argument, export_at_exit, stage
+from maintenance_data import get_default_data
+from replacement_pool import ReplacementPool
+from url_canonical import get_youtube_video_id
 
-def get_youtube_video_id(url):
-    """Extract YouTube video ID from URL"""
-    # Match YouTube URL patterns
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu.be\/|youtube\.com\/embed\/|youtube\.com\/v\/)([^&\?\/]+)',
-        r'(?:youtube\.com\/watch.*v=)([^&\?\/]+)',
-        r'(?:youtu\.be\/)([^&\?\/]+)'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
-    return None
+# Number of oEmbed lookups in flight at once in batch mode
+DEFAULT_CONCURRENCY = 8
+
+# Availability of each video ID checked during this run
+_video_status = {}
+
+def check_youtube_video(video_id, use_cache=False):
+    """Check if YouTube video is available
 
-def check_youtube_video(video_id):
-    """Check if YouTube video is available"""
+    Returns None when the check was skipped because YouTube's circuit is
+    open, so callers can tell "unknown" from "unavailable".
+    """
+    if video_id in _video_status:
+        return _video_status[video_id]
+    
     # Use YouTube oEmbed endpoint to check video
     url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
-    headers = {'User-Agent': 'Mozilla/5.0 (compatible; VideoChecker/1.0)'}
     
     try:
-        response = requests.head(url, timeout=10, headers=headers)
-        return response.status_code == 200
+        # The on-disk cache only keeps available videos, so dead ones are always rechecked
+        response = http_client.fetch(url, kind='youtube-status', use_cache=use_cache, timeout=10)
+        available = response.status_code == 200
+    except DomainUnavailable:
+        available = None
     except Exception as e:
         print(f"Error checking video {video_id}: {e}")
-        return False
+        available = False
+    
+    _video_status[video_id] = available
+    return available
+
+@stage('fetch')
+def check_youtube_videos(video_ids, concurrency=DEFAULT_CONCURRENCY, use_cache=False, on_result=None):
+    """Check many video IDs concurrently, making at most one lookup per distinct ID"""
+    unique_ids = list(dict.fromkeys(vid for vid in video_ids if vid))
+    pending = [vid for vid in unique_ids if vid not in _video_status]
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(check_youtube_video, vid, use_cache): vid for vid in pending}
+        for checked, future in enumerate(as_completed(futures), 1):
+            if on_result:
+                on_result(futures[future], future.result(), checked, len(pending))
+    
+    return {vid: _video_status[vid] for vid in unique_ids}
+
+def video_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
 
 def get_replacement_videos():
     """Return a dictionary of replacement videos by emotion"""
-    return {
-        "happy": [
-            {
-                "id": "ZbZSe6N_BXs",
-                "title": "Pharrell Williams - Happy",
-                "description": "Upbeat song to match your happy mood"
-            },
-            {
-                "id": "Y66j_BUCBMY",
-                "title": "Can't Stop the Feeling - Justin Timberlake",
-                "description": "Fun and energetic song to boost your happy mood"
-            },
-            {
-                "id": "ru0K8uYEZWw",
-                "title": "Good Vibes Only - Happy Music Mix",
-                "description": "A happy music compilation to brighten your day"
-            }
-        ],
-        "sad": [
-            {
-                "id": "2Vv-BfVoq4g",
-                "title": "Lewis Capaldi - Someone You Loved",
-                "description": "Emotional ballad that resonates with sadness"
-            },
-            {
-                "id": "hLQl3WQQoQ0",
-                "title": "Adele - Someone Like You",
-                "description": "A moving song about love and loss"
-            },
-            {
-                "id": "60ItHLz5WEA",
-                "title": "Alan Walker - Faded",
-                "description": "Melancholic electronic music with emotional lyrics"
-            }
-        ],
-        "angry": [
-            {
-                "id": "5abamRO41fE",
-                "title": "Anger Management: Breathing Exercise",
-                "description": "Guided breathing technique to manage anger"
-            },
-            {
-                "id": "3L4YrGaR8E4",
-                "title": "Rage Against The Machine - Bulls On Parade",
-                "description": "Powerful song to channel your angry energy"
-            },
-            {
-                "id": "YV4oYkIeGJc",
-                "title": "Linkin Park - Numb",
-                "description": "Intense music that resonates with feelings of anger"
-            }
-        ],
-        "scared": [
-            {
-                "id": "WWloIAQpMcQ",
-                "title": "Calming Anxiety Relief",
-                "description": "Guided meditation to help with fear and anxiety"
-            },
-            {
-                "id": "O-6f5wQXSu8",
-                "title": "Guided Meditation for Fear & Anxiety",
-                "description": "Relaxation techniques to overcome feelings of fear"
-            },
-            {
-                "id": "lFcSrYw-ARY",
-                "title": "Overcoming Fear - Motivational Video",
-                "description": "Inspirational talk about facing your fears"
-            }
-        ],
-        "romantic": [
-            {
-                "id": "lJJT00wqlOo",
-                "title": "Ed Sheeran - Perfect",
-                "description": "Beautiful love song for romantic moments"
-            },
-            {
-                "id": "450p7goxZqg",
-                "title": "John Legend - All of Me",
-                "description": "Heartfelt ballad about true love"
-            },
-            {
-                "id": "rtOvBOTyX00",
-                "title": "Elvis Presley - Can't Help Falling In Love",
-                "description": "Classic romantic song that stands the test of time"
-            }
-        ],
-        "relaxed": [
-            {
-                "id": "uCD-qMfBWDM",
-                "title": "Relaxing Ocean Waves",
-                "description": "Peaceful ocean sounds to help you unwind"
-            },
-            {
-                "id": "77ZozI0rw7w",
-                "title": "Calming Piano Music",
-                "description": "Gentle instrumental music for relaxation"
-            },
-            {
-                "id": "lE6RYpe9FSg",
-                "title": "Ambient Music for Deep Relaxation",
-                "description": "Soothing sounds to help you find peace and calm"
-            }
-        ],
-        "lost": [
-            {
-                "id": "QkrJWE1uG-c",
-                "title": "Finding Your Purpose - Motivational",
-                "description": "Inspirational video about finding your way in life"
-            },
-            {
-                "id": "p4XTMvagCKI",
-                "title": "How To Find Yourself When You're Feeling Lost",
-                "description": "Practical guidance for times of uncertainty"
-            },
-            {
-                "id": "36m1o-tM05g",
-                "title": "Finding Direction When You Feel Lost",
-                "description": "Helpful advice for navigating life's crossroads"
-            }
-        ],
-        "stressed": [
-            {
-                "id": "O-6f5wQXSu8",
-                "title": "10-Minute Meditation For Stress",
-                "description": "Quick guided meditation to reduce stress"
-            },
-            {
-                "id": "Wd_Yzj-nIYk",
-                "title": "Stress Relief Breathing Techniques",
-                "description": "Simple exercises to calm your mind and body"
-            },
-            {
-                "id": "sG7DBA-mgFY",
-                "title": "Nature Sounds for Stress Relief",
-                "description": "Relaxing natural soundscapes to ease tension"
-            }
-        ],
-        "sleepy": [
-            {
-                "id": "qYnA9wWFHLI",
-                "title": "8 Hour Sleep Music",
-                "description": "Soothing sounds to help you fall asleep"
-            },
-            {
-                "id": "1ZYbU82GVz4",
-                "title": "Rain Sounds for Sleeping",
-                "description": "Gentle rain ambience to help you drift off"
-            },
-            {
-                "id": "DGQwd1_dpuc",
-                "title": "Deep Sleep Music with Delta Waves",
-                "description": "Sleep-inducing music designed to improve sleep quality"
-            }
-        ]
-    }
+    data = get_default_data()
+    videos = {}
+    for (emotion, content_type), urls in data.candidate_table('video').items():
+        for url in urls:
+            entry = data.entry(emotion, content_type, url) or {}
+            # Only curated videos come with the title and description to use
+            if entry.get('title') and entry.get('description'):
+                videos.setdefault(emotion, []).append({
+                    'id': get_youtube_video_id(url),
+                    'title': entry['title'],
+                    'description': entry['description']
+                })
+    return videos
+
+def update_content_data(concurrency=DEFAULT_CONCURRENCY, use_cache=False, shard_dir=None):
+    """Check and update YouTube video links in ContentData.json
 
-def update_content_data():
-    """Check and update YouTube video links in ContentData.json"""
+    Only URLs are needed to pick replacements, so the catalog is streamed
+    rather than loaded: the first pass keeps each item's URL (and a video's
+    title and description), the second applies the replacements while
+    streaming the items into the new file. With shard_dir, only the video
+    shards of the sharded catalog are read and written.
+    """
     # Load the content data
     json_file_path = "SentimentSync/Resources/ContentData.json"
-    with open(json_file_path, 'r') as f:
-        content_data = json.load(f)
+    if shard_dir:
+        catalog = ShardedCatalog(shard_dir)
+        content_data = catalog.load(types=['video'])
+    else:
+        with stage('load'):
+            content_data = [url_entry(item, 'video') for item in iter_items(json_file_path)]
     
     # Get replacement videos
     replacement_videos = get_replacement_videos()
     
-    # Track changes
+    # Track changes, with the replaced items by ID
     updates_made = 0
-    checked_count = 0
+    replaced = {}
     
     # Filter for video items
     video_items = [item for item in content_data if item['type'] == 'video']
-    total_videos = len(video_items)
+    video_ids = {item['id']: get_youtube_video_id(item['url']) for item in video_items}
+    
+    def report_progress(video_id, available, checked, total):
+        if checked % 5 == 0:
+            print(f"Progress: {checked}/{total} videos checked")
+    
+    # Check each distinct video once, concurrently
+    unique_count = len(set(vid for vid in video_ids.values() if vid))
+    print(f"Checking {len(video_items)} YouTube videos ({unique_count} unique)...")
+    video_status = check_youtube_videos(
+        video_ids.values(),
+        concurrency=concurrency,
+        use_cache=use_cache,
+        on_result=report_progress
+    )
+    
+    # Replacement videos are handed out once each, and only if they are available themselves
+    videos_by_url = {
+        video_url(video['id']): video
+        for videos in replacement_videos.values() for video in videos
+    }
     
-    print(f"Checking {total_videos} YouTube videos...")
+    def available_videos(candidates):
+        status = check_youtube_videos([get_youtube_video_id(url) for url in candidates],
+                                      concurrency=concurrency, use_cache=use_cache)
+        return {url for url in candidates if status[get_youtube_video_id(url)]}
+    
+    index = CatalogIndex(content_data)
+    pool = ReplacementPool(
+        {(emotion, 'video'): [video_url(video['id']) for video in videos]
+         for emotion, videos in replacement_videos.items()},
+        index,
+        validate=available_videos
+    )
     
-    # Check each video
     for item in video_items:
         emotion = item['emotion']
-        url = item['url']
-        video_id = get_youtube_video_id(url)
-        
-        checked_count += 1
-        if checked_count % 5 == 0:
-            print(f"Progress: {checked_count}/{total_videos} videos checked")
+        video_id = video_ids[item['id']]
         
-        if not video_id or not check_youtube_video(video_id):
+        if video_id and video_status[video_id] is None:
+            # YouTube is failing right now, so this video's status is unknown
+            continue
+        if not video_id or not video_status[video_id]:
             # Video not available, replace it
-            if emotion in replacement_videos and replacement_videos[emotion]:
-                # Get a replacement (use index based on the hash of the original URL for consistency)
-                replacements = replacement_videos[emotion]
-                replacement = replacements[hash(url) % len(replacements)]
+            new_url = pool.take(emotion, 'video')
+            if new_url:
+                replacement = videos_by_url[new_url]
                 
                 # Update the item
                 old_url = item['url']
                 old_title = item['title']
                 
-                item['url'] = f"https://www.youtube.com/watch?v={replacement['id']}"
+                index.set_url(item, new_url)
                 item['title'] = replacement['title']
                 item['description'] = replacement['description']
                 
@@ -240,20 +163,36 @@ def update_content_data():
                 print(f"  New URL: {item['url']}")
                 print(f"  New Title: {item['title']}")
                 
+                replaced[item['id']] = item
                 updates_made += 1
             else:
-                print(f"Warning: No replacement found for {emotion} video: {item['title']}")
-        
-        # Be nice to YouTube's servers
-        time.sleep(0.5)
+                print(f"Warning: No unused replacement left for {emotion} video: {item['title']}")
+    
+    pool.report()
     
     # Save updated data if changes were made
     if updates_made > 0:
-        with open(json_file_path, 'w') as f:
-            json.dump(content_data, f, indent=4)
-        print(f"\nUpdated {updates_made} video items in {json_file_path}")
+        if shard_dir:
+            catalog.write(content_data, types=['video'])
+            print(f"\nUpdated {updates_made} video items in {shard_dir}")
+        else:
+            update_catalog(json_file_path, {
+                item_id: {field: item[field] for field in ('url', 'title', 'description')}
+                for item_id, item in replaced.items()
+            })
+            print(f"\nUpdated {updates_made} video items in {json_file_path}")
     else:
         print("\nAll YouTube videos are working correctly!")
 
 if __name__ == "__main__":
-    update_content_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check and replace YouTube videos in ContentData.json")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="maximum number of videos checked at once")
+    parser.add_argument('--cache', action='store_true',
+                        help="reuse availability results from previous runs")
+    add_shards_argument(parser)
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+    export_at_exit(args.metrics)
+    
+    update_content_data(concurrency=args.concurrency, use_cache=args.cache, shard_dir=args.shards)
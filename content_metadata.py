@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+import codecs
+import time
+import http_client
+from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from domain_health import DomainUnavailable
+from html.parser import HTMLParser
+from instrumentation import record_stage, stage
+from url_canonical import get_spotify_track_id, get_youtube_video_id
+from urllib.parse import quote, urlparse
+
+# Bytes of an article page downloaded to find its status, title and description
+MAX_ARTICLE_BYTES = 256 * 1024
+
+# Number of Spotify lookups in flight at once in batch mode
+DEFAULT_SPOTIFY_CONCURRENCY = 8
+
+# Metadata of each Spotify track ID fetched during this run
+_spotify_metadata = {}
+
+@stage('fetch')
+def get_youtube_metadata(url):
+    """Extract metadata from a YouTube URL"""
+    try:
+        video_id = get_youtube_video_id(url)
+        if video_id is None:
+            return None
+        # Use YouTube oEmbed API to get video metadata
+        oembed_url = f"https://www.youtube.com/oembed?url=https://www.youtube.com/watch?v={video_id}&format=json"
+        response = http_client.fetch(oembed_url, kind='oembed', timeout=10)
+        
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                'title': data.get('title', ''),
+                'author': data.get('author_name', '')
+            }
+    except Exception as e:
+        print(f"Error getting YouTube metadata for {url}: {e}")
+    
+    return None
+
+def _spotify_oembed_metadata(track_id):
+    """Return {'title', 'artist'} from Spotify's oEmbed endpoint, or None"""
+    track_url = f"https://open.spotify.com/track/{track_id}"
+    oembed_url = f"https://open.spotify.com/oembed?url={quote(track_url, safe='')}"
+    response = http_client.fetch(oembed_url, kind='spotify-oembed', timeout=10)
+    if response.status_code == 200:
+        data = response.json()
+        if data.get('title'):
+            # oEmbed names the track but (unlike the page) usually not the artist
+            return {
+                'title': data['title'],
+                'artist': data.get('author_name', '')
+            }
+    return None
+
+def _scrape_spotify_metadata(url):
+    """Return {'title', 'artist'} from the og: tags of a Spotify track page, or None"""
+    # Since we can't use Spotify API directly without authentication,
+    # we'll try to scrape the title from the OG metadata on the page
+    response = http_client.fetch(url, kind='song', timeout=10)
+    
+    if response.status_code == 200:
+        with stage('parse'):
+            soup = BeautifulSoup(response.text, 'html.parser')
+        title = soup.find('meta', property='og:title')
+        description = soup.find('meta', property='og:description')
+        
+        if title:
+            title_text = title.get('content', '')
+            description_text = description.get('content', '') if description else ''
+            
+            # Parse artist from description if available
+            artist = ''
+            if description_text and '·' in description_text:
+                artist = description_text.split('·')[0].strip()
+            
+            return {
+                'title': title_text,
+                'artist': artist
+            }
+    return None
+
+def _lookup_spotify_metadata(url):
+    """Like get_spotify_metadata, but raises DomainUnavailable while Spotify is failing"""
+    track_id = get_spotify_track_id(url)
+    if track_id in _spotify_metadata:
+        return _spotify_metadata[track_id]
+    
+    metadata = None
+    try:
+        if track_id:
+            metadata = _spotify_oembed_metadata(track_id)
+        if metadata is None:
+            metadata = _scrape_spotify_metadata(url)
+    except DomainUnavailable:
+        # Not remembered, so the next lookup tries again
+        raise
+    except Exception as e:
+        print(f"Error getting Spotify metadata for {url}: {e}")
+    
+    if track_id:
+        _spotify_metadata[track_id] = metadata
+    return metadata
+
+def _try_spotify_metadata(url):
+    """Return (looked_up, metadata); looked_up is False if Spotify's circuit is open"""
+    try:
+        return True, _lookup_spotify_metadata(url)
+    except DomainUnavailable:
+        return False, None
+
+def _timed_spotify_metadata(url):
+    started = time.monotonic()
+    return _try_spotify_metadata(url), time.monotonic() - started
+
+@stage('fetch')
+def get_spotify_metadata(url):
+    """Extract metadata from a Spotify URL
+
+    Asks the lightweight oEmbed endpoint first and only downloads and
+    parses the track page when that fails. Each track ID is looked up at
+    most once per run, whichever form its URL takes.
+    """
+    return _try_spotify_metadata(url)[1]
+
+@stage('fetch')
+def get_spotify_metadata_batch(urls, concurrency=DEFAULT_SPOTIFY_CONCURRENCY, timings=None):
+    """Fetch metadata for many Spotify URLs concurrently, once per distinct track
+
+    Returns {url: metadata or None}. A track that couldn't be found
+    gets None, which also means its URL is dead; URLs that weren't looked
+    up because open.spotify.com is failing are left out. If `timings` is
+    given, it is filled with {url: seconds its track's lookup took}.
+    """
+    by_track = {}
+    for url in urls:
+        by_track.setdefault(get_spotify_track_id(url) or url, url)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = dict(zip(by_track, executor.map(_timed_spotify_metadata, by_track.values())))
+    found = {}
+    for url in urls:
+        (looked_up, metadata), seconds = results[get_spotify_track_id(url) or url]
+        if timings is not None:
+            timings[url] = seconds
+        if looked_up:
+            found[url] = metadata
+    return found
+
+class ArticleMetadataParser(HTMLParser):
+    """Incremental extractor for an article's title and description
+
+    Collects the first <h1>, <title> and first <p> text and the
+    description/og:title/og:description meta tags while the page is fed
+    in chunks, so no document tree is built. `done` turns True as soon as
+    the best-ranked title (<h1>) and description (meta description, which
+    is expected in <head>) are known, and the rest of the page can be
+    skipped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.fields = {}
+        # Field whose text is being collected, and the tag that ends it
+        self._capturing = None
+        self._closing_tag = None
+        self._text = []
+        self.head_closed = False
+        self.bytes_fed = 0
+        # CPU time spent parsing, for instrumentation
+        self.parse_seconds = 0.0
+
+    def feed_bytes(self, chunk):
+        """Feed a chunk of the raw page; returns True once parsing can stop"""
+        started = time.perf_counter()
+        self.bytes_fed += len(chunk)
+        self.feed(self._decoder.decode(chunk))
+        self.parse_seconds += time.perf_counter() - started
+        return self.done
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            attrs = dict(attrs)
+            key = attrs.get('name') if attrs.get('name') == 'description' else attrs.get('property')
+            if key in ('description', 'og:title', 'og:description'):
+                self.fields.setdefault(key, attrs.get('content'))
+        elif tag == 'body':
+            self.head_closed = True
+        elif tag in ('p', 'h1') and self._capturing == 'p':
+            # An unclosed <p> ends where the next one or a block-level <h1> starts
+            self._finish()
+        if tag in ('h1', 'title', 'p') and self._capturing is None and tag not in self.fields:
+            self._capturing = tag
+            self._closing_tag = tag
+            self._text = []
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_closed = True
+        if tag == self._closing_tag:
+            self._finish()
+
+    def handle_data(self, data):
+        if self._capturing:
+            self._text.append(data)
+
+    def _finish(self):
+        self.fields[self._capturing] = ''.join(self._text).strip()
+        self._capturing = None
+        self._closing_tag = None
+
+    @property
+    def done(self):
+        title_known = bool(self.fields.get('h1'))
+        description_known = bool(self.fields.get('description')) or (
+            self.head_closed and ('og:description' in self.fields or 'p' in self.fields)
+        )
+        return title_known and description_known
+
+    def result(self):
+        """Return {'title', 'description'} from what was parsed, or None without a title"""
+        started = time.perf_counter()
+        self.feed(self._decoder.decode(b'', final=True))
+        self.close()
+        if self._capturing:
+            self._finish()
+        self.parse_seconds += time.perf_counter() - started
+
+        title = self.fields.get('h1') or self.fields.get('og:title') or self.fields.get('title')
+        description = (self.fields.get('description') or self.fields.get('og:description')
+                       or self.fields.get('p'))
+        if title:
+            return {
+                'title': title[:100],  # Limit length
+                'description': description[:200] if description else ''  # Limit length
+            }
+        return None
+
+def parse_article_metadata(html):
+    """Pick an article's title and description out of its HTML"""
+    parser = ArticleMetadataParser()
+    parser.feed(html)
+    return parser.result()
+
+def parse_article_body(content):
+    """Like parse_article_metadata, for a raw (undecoded) response body
+
+    Returns (metadata, seconds spent parsing), so callers running it in a
+    worker process can still record the parse time.
+    """
+    parser = ArticleMetadataParser()
+    parser.feed_bytes(content)
+    return parser.result(), parser.parse_seconds
+
+@stage('fetch')
+def fetch_article(url, timeout=15):
+    """Check an article and extract its metadata from a single GET
+
+    The page is parsed as it streams in, and the download stops once the
+    title and description are found or MAX_ARTICLE_BYTES have been read.
+    Returns a dict with the HTTP status (None if the request failed, with
+    the exception in 'error'), the final URL after redirects, whether the
+    page is reachable, the parsed metadata (None if unavailable), and
+    whether the check was skipped because the article's domain is down,
+    and how many seconds the check took.
+    """
+    started = time.monotonic()
+    result = {'status': None, 'final_url': url, 'ok': False, 'metadata': None, 'error': None, 'skipped': False}
+    parser = ArticleMetadataParser()
+    try:
+        response = http_client.fetch(url, kind='article', max_bytes=MAX_ARTICLE_BYTES,
+                                     stop_when=parser.feed_bytes, timeout=timeout)
+        result['status'] = response.status_code
+        result['final_url'] = response.url or url
+        result['ok'] = response.status_code < 400
+        if response.status_code == 200:
+            if not parser.bytes_fed:
+                # Served from the cache, so nothing was streamed through the parser
+                parser.feed_bytes(response.content)
+            result['metadata'] = parser.result()
+    except DomainUnavailable as e:
+        result['error'] = e
+        result['skipped'] = True
+    except Exception as e:
+        print(f"Error fetching article {url}: {e}")
+        result['error'] = e
+    if parser.bytes_fed:
+        record_stage('parse', parser.parse_seconds)
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+def get_article_metadata(url):
+    """Extract metadata from an article URL"""
+    return fetch_article(url)['metadata']
+
+def get_metadata(url, content_type):
+    """Fetch metadata for a catalog URL based on its content type"""
+    domain = urlparse(url).netloc
+    
+    if content_type == 'video' and ('youtube.com' in domain or 'youtu.be' in domain):
+        return get_youtube_metadata(url)
+    elif content_type == 'song' and 'spotify.com' in domain:
+        return get_spotify_metadata(url)
+    elif content_type == 'article':
+        return get_article_metadata(url)
+    
+    return None
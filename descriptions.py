@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import hashlib
+from maintenance_data import get_default_data
+
+# Per content type: the metadata field naming the creator, the title used when
+# there is none, and the text after the title with and without a creator.
+# Articles are described from their own description instead (see describe).
+TEMPLATES = {
+    "video": ('author', 'Video content',
+              " - This video {phrase} and is perfect for when you're feeling {emotion}.",
+              " - This video {phrase} and is perfect for when you're feeling {emotion}."),
+    "song": ('artist', 'Music',
+             " - This song {phrase} and resonates with your {emotion} mood.",
+             " - This music {phrase} and resonates with your {emotion} mood."),
+}
+ARTICLE_WITH_DESCRIPTION = ". This article {phrase} when you're feeling {emotion}."
+ARTICLE_WITHOUT_DESCRIPTION = "An insightful article that {phrase} when you're feeling {emotion}."
+OTHER_CONTENT = "Content that {phrase} when you're feeling {emotion}."
+
+def phrase_index(title, count):
+    """Pick one of `count` phrases for a title, the same way in every process"""
+    digest = hashlib.blake2b(title.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') % count
+
+class DescriptionEngine:
+    """Emotion-aware descriptions from precompiled per-emotion templates
+
+    The phrase tables (from maintenance_data.json) and templates are
+    expanded once, for every emotion and phrase, into ready-made text so
+    that describing an item is a hash of its title and a string
+    concatenation. Phrases are chosen with blake2b rather than hash(), so
+    every run produces the same descriptions.
+    """
+
+    def __init__(self, data=None):
+        self.data = data
+        self._compiled = {}
+
+    def _suffixes(self, emotion, content_type):
+        """Return the expanded templates for every phrase of an emotion, built on first use"""
+        key = (emotion, content_type)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            if content_type in TEMPLATES:
+                templates = TEMPLATES[content_type][2:]
+            elif content_type == "article":
+                templates = (ARTICLE_WITH_DESCRIPTION, ARTICLE_WITHOUT_DESCRIPTION)
+            else:
+                templates = (OTHER_CONTENT,)
+            compiled = [
+                tuple(template.format(phrase=phrase, emotion=emotion) for template in templates)
+                for phrase in (self.data or get_default_data()).phrases(emotion)
+            ]
+            self._compiled[key] = compiled
+        return compiled
+
+    def describe(self, metadata, emotion, content_type):
+        """Return the description of one item's fetched metadata"""
+        suffixes = self._suffixes(emotion, content_type)
+        chosen = suffixes[phrase_index(metadata.get('title', ''), len(suffixes))]
+
+        if content_type in TEMPLATES:
+            creator_field, default_title, _, _ = TEMPLATES[content_type]
+            title = metadata.get('title', default_title)
+            creator = metadata.get(creator_field, '')
+            if creator:
+                return f"{title} by {creator}{chosen[0]}"
+            return f"{title}{chosen[1]}"
+
+        if content_type == "article":
+            description = metadata.get('description', '')
+            if description:
+                # Use the first sentence or part of the description
+                return description.split('.')[0] + chosen[0]
+            return chosen[1]
+
+        return chosen[0]
+
+    def describe_batch(self, entries):
+        """Return descriptions for an iterable of (metadata, emotion, content_type), in order"""
+        describe = self.describe
+        return [describe(metadata, emotion, content_type) for metadata, emotion, content_type in entries]
+
+def keeps_description(item, metadata):
+    """Return True if a refresh from `metadata` should leave the item's description alone
+
+    Spotify's oEmbed doesn't name the artist, so a song whose title is
+    unchanged keeps its current description (which may) instead of
+    getting one without the artist.
+    """
+    return (item['type'] == 'song' and not metadata.get('artist')
+            and (metadata.get('title') or item['title']) == item['title']
+            and bool(item.get('description')))
+
+_default_engine = DescriptionEngine()
+
+def create_emotion_description(metadata, emotion, content_type="article"):
+    """Create a description that incorporates the emotion"""
+    return _default_engine.describe(metadata, emotion, content_type)
+
+def create_emotion_descriptions(entries):
+    """Create descriptions for a batch of (metadata, emotion, content_type) entries"""
+    return _default_engine.describe_batch(entries)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from requests.exceptions import RequestException
+from urllib.parse import urlparse
+
+DEFAULT_HEALTH_PATH = ".cache/domain_health.sqlite3"
+
+# Circuit breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Consecutive failures that open a domain's circuit
+FAILURE_THRESHOLD = 5
+
+# Rolling window of outcomes used for the error rate, and the rate that opens the circuit
+WINDOW_SIZE = 20
+ERROR_RATE_THRESHOLD = 0.5
+MIN_WINDOW_SAMPLES = 10
+
+# Seconds an open circuit rejects requests before letting a trial request through
+OPEN_SECONDS = 300
+
+# Trial requests allowed at once while half-open
+HALF_OPEN_PROBES = 1
+
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.2
+
+# Statuses that count against the host rather than the URL (a 404 is the page's problem)
+FAILURE_STATUSES = (429, 500, 502, 503, 504)
+
+class DomainUnavailable(RequestException):
+    """Raised instead of sending a request to a domain whose circuit is open"""
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+def is_failure(status, error):
+    """Return True if a request outcome says the host itself is unhealthy"""
+    return error is not None or status in FAILURE_STATUSES
+
+class DomainState:
+    """Circuit breaker and rolling statistics for one domain"""
+
+    def __init__(self, state=CLOSED, opened_at=0.0, consecutive_failures=0, outcomes=(), latency_ewma=None):
+        self.state = state
+        self.opened_at = opened_at
+        self.consecutive_failures = consecutive_failures
+        # True for failures, newest last
+        self.outcomes = deque(outcomes, maxlen=WINDOW_SIZE)
+        self.latency_ewma = latency_ewma
+        self.probes_in_flight = 0
+
+    @property
+    def error_rate(self):
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'opened_at': self.opened_at,
+            'consecutive_failures': self.consecutive_failures,
+            'error_rate': round(self.error_rate, 3),
+            'latency_ewma': self.latency_ewma,
+        }
+
+class DomainHealth:
+    """Per-domain circuit breakers persisted across runs
+
+    Every request outcome is recorded against its domain. A domain whose
+    requests keep failing (FAILURE_THRESHOLD in a row, or an error rate of
+    ERROR_RATE_THRESHOLD over the last WINDOW_SIZE requests) is opened:
+    requests to it are refused for OPEN_SECONDS, then a single trial
+    request decides whether it closes again. URLs are still checked one by
+    one; only a domain known to be down is skipped as a whole.
+    """
+
+    def __init__(self, path=DEFAULT_HEALTH_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._domains = {}
+        self._dirty = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                opened_at REAL NOT NULL,
+                consecutive_failures INTEGER NOT NULL,
+                outcomes TEXT NOT NULL,
+                latency_ewma REAL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        for domain, state, opened_at, failures, outcomes, latency in self._db.execute(
+                "SELECT domain, state, opened_at, consecutive_failures, outcomes, latency_ewma FROM domains"):
+            self._domains[domain] = DomainState(state, opened_at, failures, json.loads(outcomes), latency)
+
+    def _get(self, domain):
+        if domain not in self._domains:
+            self._domains[domain] = DomainState()
+        return self._domains[domain]
+
+    def allow(self, url):
+        """Return True if a request to the URL's domain may be sent now"""
+        domain = domain_of(url)
+        with self._lock:
+            health = self._get(domain)
+            if health.state == OPEN:
+                if time.time() - health.opened_at < OPEN_SECONDS:
+                    return False
+                health.state = HALF_OPEN
+                health.probes_in_flight = 0
+                self._dirty.add(domain)
+            if health.state == HALF_OPEN:
+                if health.probes_in_flight >= HALF_OPEN_PROBES:
+                    return False
+                health.probes_in_flight += 1
+            return True
+
+    def check(self, url):
+        """Raise DomainUnavailable if the URL's domain is refusing requests"""
+        if not self.allow(url):
+            raise DomainUnavailable(f"{domain_of(url)} is failing; skipping {url}")
+
+    def record(self, url, status=None, error=None, seconds=None):
+        """Record the outcome of one request and move the domain's circuit accordingly"""
+        domain = domain_of(url)
+        failed = is_failure(status, error)
+        with self._lock:
+            health = self._get(domain)
+            health.outcomes.append(failed)
+            if seconds is not None and not failed:
+                if health.latency_ewma is None:
+                    health.latency_ewma = seconds
+                else:
+                    health.latency_ewma += LATENCY_ALPHA * (seconds - health.latency_ewma)
+
+            if failed:
+                health.consecutive_failures += 1
+                too_many = health.consecutive_failures >= FAILURE_THRESHOLD or (
+                    len(health.outcomes) >= MIN_WINDOW_SAMPLES and health.error_rate >= ERROR_RATE_THRESHOLD
+                )
+                if health.state == HALF_OPEN or too_many:
+                    if health.state != OPEN:
+                        print(f"Circuit opened for {domain} ({health.consecutive_failures} failures in a row, "
+                              f"{health.error_rate:.0%} error rate)")
+                    health.state = OPEN
+                    health.opened_at = time.time()
+            else:
+                health.consecutive_failures = 0
+                if health.state == HALF_OPEN:
+                    print(f"Circuit closed for {domain}")
+                    health.state = CLOSED
+                    health.outcomes.clear()
+            if health.state != HALF_OPEN:
+                health.probes_in_flight = 0
+            else:
+                health.probes_in_flight = max(0, health.probes_in_flight - 1)
+            self._dirty.add(domain)
+
+    def state(self, url):
+        with self._lock:
+            return self._get(domain_of(url)).state
+
+    def snapshot(self):
+        """Return {domain: stats} for every known domain"""
+        with self._lock:
+            return {domain: health.to_dict() for domain, health in sorted(self._domains.items())}
+
+    def reset(self, domain=None):
+        """Forget the health of one domain, or of all of them"""
+        with self._lock:
+            if domain is None:
+                self._domains.clear()
+                self._dirty.clear()
+                self._db.execute("DELETE FROM domains")
+            else:
+                self._domains.pop(domain, None)
+                self._dirty.discard(domain)
+                self._db.execute("DELETE FROM domains WHERE domain = ?", (domain,))
+            self._db.commit()
+
+    def save(self):
+        """Write changed domains to disk"""
+        with self._lock:
+            rows = [
+                (domain, health.state, health.opened_at, health.consecutive_failures,
+                 json.dumps(list(health.outcomes)), health.latency_ewma, time.time())
+                for domain, health in ((d, self._domains[d]) for d in self._dirty if d in self._domains)
+            ]
+            self._db.executemany("INSERT OR REPLACE INTO domains VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            self._dirty.clear()
+
+    def close(self):
+        self.save()
+        self._db.close()
+
+_default_health = None
+_default_health_lock = threading.Lock()
+
+def get_default_health():
+    """Return the process-wide registry stored at DEFAULT_HEALTH_PATH, saved at exit"""
+    global _default_health
+    if _default_health is None:
+        with _default_health_lock:
+            if _default_health is None:
+                _default_health = DomainHealth()
+                atexit.register(_default_health.close)
+    return _default_health
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or reset the domain health registry")
+    parser.add_argument('--reset', nargs='?', const='*', metavar='DOMAIN',
+                        help="forget one domain's health, or every domain's without an argument")
+    args = parser.parse_args()
+
+    health = DomainHealth()
+    if args.reset:
+        health.reset(None if args.reset == '*' else args.reset)
+        print("Domain health reset")
+    for domain, stats in health.snapshot().items():
+        latency = f"{stats['latency_ewma'] * 1000:.0f} ms" if stats['latency_ewma'] is not None else '-'
+        print(f"{domain:<40} {stats['state']:<10} {stats['error_rate']:>6.0%} errors  {latency:>8}")
+    health.close()
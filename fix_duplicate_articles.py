@@ -1,265 +1,33 @@
 #!/usr/bin/env python3
-import json
-import requests
-import re
-import time
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+import argparse
+from catalog_io import DEFAULT_CHECKPOINT_INTERVAL, Checkpointer, load_catalog
 from collections import defaultdict
+from catalog_index import CatalogIndex
+from descriptions import create_emotion_description
+from instrumentation import add_metrics_argument, export_at_exit, stage
+from maintenance_data import get_default_data
+from near_duplicates import DEFAULT_THRESHOLD, find_near_duplicate_groups
+from replacement_pool import ReplacementPool
+from replacement_warmup import ReplacementWarmer
 
-# Headers to mimic a browser
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36',
-    'Accept-Language': 'en-US,en;q=0.9',
-}
+def fix_duplicate_articles(strategy='exact', threshold=DEFAULT_THRESHOLD, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+    """Find and fix duplicate articles in ContentData.json
 
-# Replacement article URLs by emotion
-REPLACEMENT_URLS = {
-    "happy": [
-        "https://www.health.harvard.edu/blog/the-happiness-diet-eating-to-feel-good-2022050222089",
-        "https://www.verywellmind.com/how-to-be-happy-4157199",
-        "https://www.mayoclinic.org/healthy-lifestyle/stress-management/in-depth/positive-thinking/art-20043950",
-        "https://www.helpguide.org/articles/mental-health/cultivating-happiness.htm",
-        "https://www.psychologytoday.com/us/blog/click-here-happiness/201801/how-be-happy-23-ways-be-happier",
-        "https://www.ted.com/talks/dan_gilbert_the_surprising_science_of_happiness",
-        "https://greatergood.berkeley.edu/article/item/happy_life_different_from_meaningful_life",
-        "https://www.health.harvard.edu/mind-and-mood/the-happiness-diet-eating-to-feel-good",
-        "https://www.nytimes.com/guides/well/how-to-be-happy",
-        "https://www.healthline.com/health/how-to-be-happy"
-    ],
-    "sad": [
-        "https://www.psychologytoday.com/us/blog/the-squeaky-wheel/201307/10-things-you-shouldnt-do-when-youre-sad",
-        "https://www.verywellmind.com/coping-with-sadness-3144606",
-        "https://www.healthline.com/health/depression/how-to-fight-depression",
-        "https://www.helpguide.org/articles/depression/coping-with-depression.htm",
-        "https://www.mayoclinic.org/diseases-conditions/depression/symptoms-causes/syc-20356007",
-        "https://www.psychologytoday.com/us/blog/emotional-fitness/201311/10-things-do-when-youre-feeling-sad",
-        "https://www.healthline.com/health/depression/how-to-fight-depression",
-        "https://www.mind.org.uk/information-support/types-of-mental-health-problems/depression/about-depression/",
-        "https://www.webmd.com/depression/features/natural-treatments",
-        "https://www.nami.org/About-Mental-Illness/Mental-Health-Conditions/Depression"
-    ],
-    "angry": [
-        "https://www.apa.org/topics/anger/control",
-        "https://www.mayoclinic.org/healthy-lifestyle/adult-health/in-depth/anger-management/art-20045434",
-        "https://www.healthline.com/health/mental-health/how-to-control-anger",
-        "https://www.psychologytoday.com/us/basics/anger",
-        "https://www.helpguide.org/articles/relationships-communication/anger-management.htm",
-        "https://www.verywellmind.com/anger-management-strategies-4178870",
-        "https://www.mind.org.uk/information-support/types-of-mental-health-problems/anger/",
-        "https://www.nhs.uk/mental-health/feelings-symptoms-behaviours/feelings-and-symptoms/anger/",
-        "https://www.betterhealth.vic.gov.au/health/healthyliving/anger-how-it-affects-people",
-        "https://www.goodtherapy.org/learn-about-therapy/issues/anger"
-    ],
-    "scared": [
-        "https://www.verywellmind.com/how-to-cope-with-fear-2671631",
-        "https://www.psychologytoday.com/us/blog/the-courage-be-present/201001/how-practice-being-fear",
-        "https://www.healthline.com/health/how-to-overcome-fear",
-        "https://www.helpguide.org/articles/anxiety/phobias-and-fears.htm",
-        "https://www.mind.org.uk/information-support/types-of-mental-health-problems/phobias/about-phobias/",
-        "https://www.apa.org/topics/anxiety/panic-disorder",
-        "https://www.mayoclinic.org/diseases-conditions/anxiety/symptoms-causes/syc-20350961",
-        "https://www.health.harvard.edu/blog/coping-with-coronavirus-anxiety-2020031219183",
-        "https://www.webmd.com/anxiety-panic/features/coping-with-anxiety",
-        "https://www.nhs.uk/mental-health/feelings-symptoms-behaviours/feelings-and-symptoms/fear-and-anxiety/"
-    ],
-    "romantic": [
-        "https://www.psychologytoday.com/us/basics/relationships",
-        "https://www.helpguide.org/articles/relationships-communication/relationship-help.htm",
-        "https://www.gottman.com/blog/category/romance-friendship/",
-        "https://www.verywellmind.com/all-about-healthy-relationship-4774802",
-        "https://www.psychologytoday.com/us/blog/in-the-name-love/201502/10-ways-express-love",
-        "https://www.healthline.com/health/relationships/relationship-advice",
-        "https://greatergood.berkeley.edu/topic/love_relationships",
-        "https://www.nytimes.com/guides/well/how-to-have-a-better-relationship",
-        "https://www.psychologytoday.com/us/blog/in-the-name-love/202002/what-is-romantic-love",
-        "https://www.marriage.com/advice/romance/"
-    ],
-    "relaxed": [
-        "https://www.mayoclinic.org/healthy-lifestyle/stress-management/in-depth/relaxation-technique/art-20045368",
-        "https://www.healthline.com/health/mental-health/relaxation-techniques",
-        "https://www.verywellmind.com/popular-relaxation-techniques-2584192",
-        "https://www.health.harvard.edu/mind-and-mood/six-relaxation-techniques-to-reduce-stress",
-        "https://www.helpguide.org/articles/stress/relaxation-techniques-for-stress-relief.htm",
-        "https://www.psychologytoday.com/us/blog/click-here-happiness/201812/self-care-101-10-ways-take-better-care-yourself",
-        "https://www.webmd.com/balance/guide/blissing-out-10-relaxation-techniques-reduce-stress-spot",
-        "https://www.nhs.uk/mental-health/self-help/guides-tools-and-activities/tips-to-reduce-stress/",
-        "https://www.mind.org.uk/information-support/types-of-mental-health-problems/stress/",
-        "https://www.apa.org/topics/stress/tips"
-    ],
-    "lost": [
-        "https://tinybuddha.com/blog/feeling-lost-how-to-find-yourself-again/",
-        "https://www.psychologytoday.com/us/blog/click-here-happiness/202009/feeling-lost-8-ways-find-yourself-again",
-        "https://www.healthline.com/health/mental-health/i-feel-lost",
-        "https://www.verywellmind.com/how-to-find-yourself-when-feeling-lost-5193133",
-        "https://greatergood.berkeley.edu/article/item/seven_ways_to_find_your_purpose_in_life",
-        "https://www.lifehack.org/articles/communication/feeling-lost-life-how-find-yourself-again.html",
-        "https://www.forbes.com/sites/womensmedia/2020/02/18/feeling-lost-how-to-find-yourself-and-get-back-on-track/",
-        "https://www.mindbodygreen.com/articles/what-to-do-when-you-feel-lost",
-        "https://medium.com/mind-cafe/feeling-lost-in-life-heres-how-to-find-your-way-again-e936bbe854fa",
-        "https://www.psychologytoday.com/us/blog/the-gen-y-psy/201810/finding-yourself-in-the-age-identity"
-    ],
-    "stressed": [
-        "https://www.mayoclinic.org/healthy-lifestyle/stress-management/in-depth/stress-relievers/art-20047257",
-        "https://www.verywellmind.com/tips-to-reduce-stress-3145195",
-        "https://www.healthline.com/health/10-ways-to-relieve-stress",
-        "https://www.helpguide.org/articles/stress/stress-management.htm",
-        "https://www.apa.org/topics/stress/tips",
-        "https://www.health.harvard.edu/mind-and-mood/protect-your-brain-from-stress",
-        "https://www.webmd.com/balance/guide/tips-to-control-stress",
-        "https://www.nhs.uk/mental-health/feelings-symptoms-behaviours/feelings-and-symptoms/stress/",
-        "https://www.mind.org.uk/information-support/types-of-mental-health-problems/stress/",
-        "https://www.psychologytoday.com/us/basics/stress"
-    ],
-    "sleepy": [
-        "https://www.sleepfoundation.org/how-sleep-works/science-of-sleep",
-        "https://www.mayoclinic.org/healthy-lifestyle/adult-health/in-depth/sleep/art-20048379",
-        "https://www.healthline.com/health/healthy-sleep",
-        "https://www.health.harvard.edu/topics/sleep",
-        "https://www.helpguide.org/articles/sleep/getting-better-sleep.htm",
-        "https://www.verywellhealth.com/the-importance-of-sleep-3014983",
-        "https://www.nhs.uk/live-well/sleep-and-tiredness/",
-        "https://www.webmd.com/sleep-disorders/ss/slideshow-sleep-tips",
-        "https://www.psychologytoday.com/us/basics/sleep",
-        "https://www.apa.org/topics/sleep/why"
-    ]
-}
+    With strategy='near', articles whose titles and descriptions are
+    near-identical are grouped even if their URL, title or description
+    differ slightly.
 
-def get_article_metadata(url):
-    """Extract metadata from an article URL"""
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=15)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to get title from various common elements
-            title = None
-            for selector in ['h1', 'meta[property="og:title"]', 'title']:
-                if not title:
-                    if selector.startswith('meta'):
-                        meta_tag = soup.select_one(selector)
-                        if meta_tag:
-                            title = meta_tag.get('content')
-                    else:
-                        title_tag = soup.select_one(selector)
-                        if title_tag:
-                            title = title_tag.text.strip()
-            
-            # Try to get description from meta tags
-            description = None
-            for selector in ['meta[name="description"]', 'meta[property="og:description"]']:
-                if not description:
-                    meta_tag = soup.select_one(selector)
-                    if meta_tag:
-                        description = meta_tag.get('content')
-            
-            # If no description found, try to get first paragraph
-            if not description:
-                first_p = soup.select_one('article p, .content p, .entry-content p, .post-content p, p')
-                if first_p:
-                    description = first_p.text.strip()
-            
-            if title:
-                return {
-                    'title': title[:100],  # Limit length
-                    'description': description[:200] if description else ''  # Limit length
-                }
-    except Exception as e:
-        print(f"Error getting article metadata for {url}: {e}")
-    
-    return None
-
-def create_emotion_description(metadata, emotion):
-    """Create a description that incorporates the emotion"""
-    # Define emotion-specific phrases
-    emotion_phrases = {
-        "happy": [
-            "uplifts your mood",
-            "brings joy and positivity",
-            "perfect for celebrating happy moments",
-            "will make you smile and feel good",
-            "enhances your happy feelings"
-        ],
-        "sad": [
-            "resonates with feelings of sadness",
-            "helps process emotional moments",
-            "provides comfort during difficult times",
-            "acknowledges and validates your feelings",
-            "offers a thoughtful perspective on sadness"
-        ],
-        "angry": [
-            "helps channel and process anger",
-            "provides an outlet for intense emotions",
-            "transforms anger into productive energy",
-            "helps you understand and manage anger",
-            "resonates with powerful emotional release"
-        ],
-        "scared": [
-            "helps overcome feelings of fear",
-            "provides comfort during anxious moments",
-            "offers perspective on dealing with fear",
-            "transforms fear into courage",
-            "helps calm your worried mind"
-        ],
-        "romantic": [
-            "captures the essence of love",
-            "perfect for romantic moments",
-            "celebrates the beauty of connection",
-            "resonates with heartfelt emotions",
-            "enhances feelings of love and intimacy"
-        ],
-        "relaxed": [
-            "promotes deep relaxation",
-            "helps you unwind and de-stress",
-            "creates a peaceful atmosphere",
-            "soothes your mind and body",
-            "perfect for calm, quiet moments"
-        ],
-        "lost": [
-            "helps find direction when feeling lost",
-            "offers guidance during uncertain times",
-            "provides clarity when you feel adrift",
-            "illuminates the path forward",
-            "helps reconnect with your purpose"
-        ],
-        "stressed": [
-            "reduces stress and tension",
-            "helps manage overwhelming feelings",
-            "provides relief from daily pressures",
-            "restores balance and calm",
-            "supports mental well-being during stressful times"
-        ],
-        "sleepy": [
-            "promotes restful sleep",
-            "helps you drift peacefully to sleep",
-            "creates the perfect bedtime atmosphere",
-            "soothes your mind for better rest",
-            "designed to improve sleep quality"
-        ]
-    }
-    
-    # Get phrases for the specified emotion
-    phrases = emotion_phrases.get(emotion, ["complements your current mood"])
-    chosen_phrase = phrases[hash(metadata.get('title', '')) % len(phrases)]
-    
-    # Create description for article
-    title = metadata.get('title', 'Article')
-    description = metadata.get('description', '')
-    if description:
-        # Use the first sentence or part of the description
-        short_desc = description.split('.')[0]
-        return f"{short_desc}. This article {chosen_phrase} when you're feeling {emotion}."
-    else:
-        return f"An insightful article that {chosen_phrase} when you're feeling {emotion}."
-
-def fix_duplicate_articles():
-    """Find and fix duplicate articles in ContentData.json"""
+    The catalog is loaded whole rather than streamed: a duplicate can be
+    anywhere in the file, near-duplicate grouping compares every article's
+    text, and the Checkpointer rewrites the catalog mid-run.
+    """
     json_file_path = "SentimentSync/Resources/ContentData.json"
     
     # Load the content data
-    with open(json_file_path, 'r') as f:
-        content_data = json.load(f)
+    content_data = load_catalog(json_file_path)
+    
+    # Index the catalog once; it is kept current as URLs are replaced
+    index = CatalogIndex(content_data)
     
     # Get all article items with their original indices in content_data
     articles = []
@@ -267,27 +35,45 @@ def fix_duplicate_articles():
         if item['type'] == 'article':
             articles.append((i, item))
     
-    # Group articles by URL, title, and description
-    article_groups = defaultdict(list)
-    for i, (orig_idx, article) in enumerate(articles):
-        # Create a key combining URL, title, and description
-        key = (article['url'], article['title'], article['description'])
-        article_groups[key].append((orig_idx, article))
-    
-    # Filter for groups that have more than one article
-    duplicates = {key: indices for key, indices in article_groups.items() if len(indices) > 1}
+    if strategy == 'near':
+        # Group articles with near-identical titles and descriptions
+        positions = {id(article): orig_idx for orig_idx, article in articles}
+        groups = find_near_duplicate_groups([article for _, article in articles], threshold=threshold)
+        duplicates = [
+            ((group[0]['url'], group[0]['title'], group[0]['description']),
+             [(positions[id(article)], article) for article in group])
+            for group in groups
+        ]
+    else:
+        with stage('dedup'):
+            # Group articles by URL, title, and description
+            article_groups = defaultdict(list)
+            for i, (orig_idx, article) in enumerate(articles):
+                # Create a key combining URL, title, and description
+                key = (article['url'], article['title'], article['description'])
+                article_groups[key].append((orig_idx, article))
+            
+            # Filter for groups that have more than one article
+            duplicates = [(key, indices) for key, indices in article_groups.items() if len(indices) > 1]
     
     if not duplicates:
         print("No duplicate articles found in the content data.")
         return
     
-    print(f"Found {len(duplicates)} duplicate article groups affecting {sum(len(indices) for indices in duplicates.values())} items")
+    print(f"Found {len(duplicates)} duplicate article groups affecting {sum(len(indices) for _, indices in duplicates)} items")
+    
+    # Replacements are handed out once each, from the URLs not already in use
+    # and known to work; their metadata comes from the warm-up cache
+    warmer = ReplacementWarmer()
+    pool = ReplacementPool(get_default_data().candidate_table('article'), index, validate=warmer.validate)
+    pool.prevalidate({(article['emotion'], 'article') for _, group in duplicates for _, article in group[1:]})
     
-    # Track replacements
+    # Track replacements, saving progress every minute or so
     replacements = 0
+    checkpoint = Checkpointer(json_file_path, content_data, interval=checkpoint_interval)
     
     # Fix duplicates
-    for (url, title, description), indices_and_articles in duplicates.items():
+    for (url, title, description), indices_and_articles in duplicates:
         print(f"\nDuplicate article: {title}")
         print(f"URL: {url}")
         print(f"Found in {len(indices_and_articles)} items:")
@@ -304,24 +90,16 @@ def fix_duplicate_articles():
             item = content_data[orig_idx]
             emotion = item['emotion']
             
-            if emotion in REPLACEMENT_URLS and REPLACEMENT_URLS[emotion]:
-                # Get a replacement URL that's not already in use
-                available_urls = [u for u in REPLACEMENT_URLS[emotion] if u not in [i['url'] for i in content_data]]
-                
-                # If no available URLs from our predefined list, use the last one and modify it slightly
-                if not available_urls and REPLACEMENT_URLS[emotion]:
-                    new_url = REPLACEMENT_URLS[emotion][-1] + f"?dup={i}"
-                else:
-                    new_url = available_urls[0] if available_urls else REPLACEMENT_URLS[emotion][0]
-                
+            # Get a live replacement URL that's not already in use
+            new_url = pool.take(emotion, 'article')
+            if new_url:
                 print(f"    Replacing with: {new_url}")
                 
                 # Update the URL
-                old_url = item['url']
-                item['url'] = new_url
+                index.set_url(item, new_url)
                 
-                # Get metadata for the new URL
-                metadata = get_article_metadata(new_url)
+                # Metadata for the new URL was fetched when it was validated
+                metadata = warmer.metadata(new_url)
                 
                 # Update item if metadata was found
                 if metadata:
@@ -342,17 +120,28 @@ def fix_duplicate_articles():
                     print(f"    Updated description: {item['description'][:50]}...")
                 
                 replacements += 1
-                
-                # Be nice to servers
-                time.sleep(1)
+                checkpoint.tick(changed=True)
+            else:
+                print("    No unused replacement left; keeping the duplicate")
+    
+    pool.report()
+    warmer.close()
     
     # Save changes
     if replacements > 0:
-        with open(json_file_path, 'w') as f:
-            json.dump(content_data, f, indent=4)
+        checkpoint.flush()
         print(f"\nReplaced {replacements} duplicate articles in {json_file_path}")
     else:
         print("\nNo changes made to the content data.")
 
 if __name__ == "__main__":
-    fix_duplicate_articles() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Find and fix duplicate articles in ContentData.json")
+    parser.add_argument('--strategy', choices=['exact', 'near'], default='exact',
+                        help="group by exact URL, title and description, or by near-identical text")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Jaccard similarity needed for the near strategy")
+    add_metrics_argument(parser)
+    args = parser.parse_args()
+    export_at_exit(args.metrics)
+    
+    fix_duplicate_articles(strategy=args.strategy, threshold=args.threshold)
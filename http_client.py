@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import threading
+import time
+import requests
+import instrumentation
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from domain_health import get_default_health
+from rate_limiter import get_default_limiter, parse_retry_after
+from response_cache import StoredResponse, get_default_cache
+
+# Headers to mimic a browser
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# (connect, read) timeout in seconds used when a caller doesn't pass one
+DEFAULT_TIMEOUT = (5, 15)
+
+# Number of distinct hosts whose connection pools are kept alive
+POOL_CONNECTIONS = 64
+
+# Keep-alive sockets kept per host; matches the per-host concurrency limit headroom
+POOL_MAXSIZE = 8
+
+# Retry policy shared by every script: transient errors only
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 504)
+
+# "Slow down" statuses; the whole host is held back by the rate limiter before retrying
+THROTTLE_STATUSES = (429, 503)
+
+# Seconds a throttled host is held back when it sends no Retry-After header
+DEFAULT_THROTTLE_DELAY = 5
+
+_session = None
+_session_lock = threading.Lock()
+
+def build_session(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """Create a requests session with pooled keep-alive connections and retries"""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['HEAD', 'GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+def request(method, url, timeout=None, limiter=None, health=None, **kwargs):
+    """Send a request through the shared session with the default timeout budget
+
+    Every attempt first checks the host's circuit breaker (raising
+    DomainUnavailable while it is open) and waits for its rate limiter. A
+    429 or 503 holds back the whole host for its Retry-After before trying
+    again.
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if limiter is None:
+        limiter = get_default_limiter()
+    if health is None:
+        health = get_default_health()
+
+    session = get_session()
+    for attempt in range(RETRY_TOTAL + 1):
+        health.check(url)
+        slept = limiter.acquire(url)
+        if slept:
+            instrumentation.record_sleep(url, slept)
+
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            instrumentation.record_request(url, None, time.perf_counter() - started)
+            health.record(url, error=e)
+            raise
+        elapsed = time.perf_counter() - started
+        health.record(url, response.status_code, seconds=elapsed)
+        # Streamed bodies are counted by whoever reads them
+        nbytes = None if kwargs.get('stream') else len(response.content)
+        instrumentation.record_request(url, response.status_code, elapsed, nbytes)
+        retries = getattr(response.raw, 'retries', None)
+        if retries is not None and retries.history:
+            instrumentation.record_retry(url, 'transient', len(retries.history))
+
+        if response.status_code not in THROTTLE_STATUSES or attempt == RETRY_TOTAL:
+            return response
+        instrumentation.record_retry(url, 'throttled')
+
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = DEFAULT_THROTTLE_DELAY * (2 ** attempt)
+        limiter.defer(url, delay)
+        response.close()
+
+def get(url, **kwargs):
+    """Send a GET request through the shared session"""
+    kwargs.setdefault('allow_redirects', True)
+    return request('GET', url, **kwargs)
+
+def head(url, **kwargs):
+    """Send a HEAD request through the shared session"""
+    kwargs.setdefault('allow_redirects', False)
+    return request('HEAD', url, **kwargs)
+
+# Bytes read from the socket at a time when streaming a body
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def get_prefix(url, max_bytes, stop_when=None, **kwargs):
+    """GET a URL but download at most `max_bytes` of its body
+
+    If `stop_when` is given it is called with each chunk as it arrives,
+    and the download stops early once it returns True. Returns a
+    response-like object whose content is the downloaded prefix and whose
+    url is the final URL after redirects.
+    """
+    response = get(url, stream=True, **kwargs)
+    try:
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            chunks.append(chunk)
+            received += len(chunk)
+            if received >= max_bytes or (stop_when is not None and stop_when(chunk)):
+                break
+        body = b''.join(chunks)[:max_bytes]
+    finally:
+        response.close()
+    instrumentation.record_bytes(url, received)
+    return StoredResponse(response.url, response.status_code, dict(response.headers), body, time.time())
+
+def fetch(url, kind='default', cache=None, use_cache=True, max_bytes=None, stop_when=None, **kwargs):
+    """GET a URL through the on-disk response cache
+
+    Fresh entries are served without touching the network. Stale entries
+    are revalidated with If-None-Match/If-Modified-Since, and only
+    successful responses are stored. With max_bytes, only that much of
+    the body is downloaded (and cached), or less if `stop_when` ends the
+    download early (see get_prefix).
+    """
+    def download(headers):
+        if max_bytes is not None:
+            return get_prefix(url, max_bytes, stop_when=stop_when, headers=headers, **kwargs)
+        return get(url, headers=headers, **kwargs)
+
+    headers = dict(kwargs.pop('headers', None) or {})
+    if not use_cache:
+        instrumentation.record_cache(kind, 'bypass')
+        return download(headers)
+    if cache is None:
+        cache = get_default_cache()
+
+    entry = cache.lookup(url)
+    if entry is not None:
+        cached, _, etag, last_modified = entry
+        if cache.is_fresh(cached, kind):
+            instrumentation.record_cache(kind, 'hit')
+            return cached
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+    response = download(headers)
+    if entry is not None and response.status_code == 304:
+        cache.mark_revalidated(url)
+        instrumentation.record_cache(kind, 'revalidated')
+        return cached
+    instrumentation.record_cache(kind, 'miss')
+    if response.status_code == 200:
+        cache.store(url, response, kind)
+    return response
+
+def close():
+    """Close the shared session and release its pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
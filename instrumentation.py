@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+import atexit
+import json
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Upper bounds, in seconds, of the latency and stage-duration histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = 'sentimentsync_'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def domain_of(url):
+    return urlparse(url).netloc.lower()
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class Metrics:
+    """Thread-safe counters and histograms keyed on a name and a set of labels"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def count(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def to_dict(self):
+        """Return a JSON-serializable summary"""
+        with self._lock:
+            return {
+                'counters': [
+                    {'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                'histograms': [
+                    {'name': name, 'labels': dict(labels), 'count': h.count, 'sum': round(h.sum, 6),
+                     'buckets': {str(bound): n for bound, n in zip(h.buckets, h.counts)}}
+                    for (name, labels), h in sorted(self.histograms.items())
+                ],
+            }
+
+    def to_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        def render_labels(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+                    typed.add(name)
+                lines.append(f"{METRIC_PREFIX}{name}{render_labels(labels)} {value}")
+            for (name, labels), h in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                    typed.add(name)
+                for bound, n in zip(h.buckets, h.counts):
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{render_labels(labels, [('le', bound)])} {n}")
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{render_labels(labels, [('le', '+Inf')])} {h.count}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{render_labels(labels)} {h.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{render_labels(labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        """Write the metrics to `path`: Prometheus text for .prom files, JSON otherwise"""
+        with open(path, 'w') as f:
+            if path.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=4)
+
+metrics = Metrics()
+
+@contextmanager
+def stage(name):
+    """Time a block (or, used as a decorator, every call) as a named stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe('stage_seconds', time.perf_counter() - started, stage=name)
+
+def record_stage(name, seconds):
+    """Record a stage duration measured elsewhere (e.g. in a worker process)"""
+    metrics.observe('stage_seconds', seconds, stage=name)
+
+def record_request(url, status, seconds, nbytes=None):
+    domain = domain_of(url)
+    metrics.count('http_requests_total', domain=domain, status=status if status is not None else 'error')
+    metrics.observe('http_request_seconds', seconds, domain=domain)
+    if nbytes:
+        record_bytes(url, nbytes)
+
+def record_bytes(url, nbytes):
+    metrics.count('http_response_bytes_total', nbytes, domain=domain_of(url))
+
+def record_retry(url, reason, retries=1):
+    metrics.count('http_retries_total', retries, domain=domain_of(url), reason=reason)
+
+def record_sleep(url, seconds):
+    metrics.count('rate_limit_sleep_seconds_total', seconds, domain=domain_of(url))
+
+def record_cache(kind, result):
+    """Count a response cache lookup: 'hit', 'revalidated', 'miss' or 'bypass'"""
+    metrics.count('cache_lookups_total', kind=kind, result=result)
+
+def export_at_exit(path):
+    """Write the collected metrics to `path` when the process exits"""
+    if path:
+        atexit.register(metrics.export, path)
+
+def add_metrics_argument(parser):
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="write run metrics on exit (Prometheus text for .prom, JSON otherwise)")
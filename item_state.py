@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import sqlite3
+import time
+
+DEFAULT_STATE_PATH = ".cache/item_state.sqlite3"
+
+# Items verified more recently than this (seconds) are skipped unless they changed
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+def content_hash(item):
+    """Return a stable hash of the fields that, when edited, call for a recheck"""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in ('url', 'title', 'description'):
+        digest.update((item.get(field) or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class ItemStateStore:
+    """Per-item record of when each catalog item was last verified
+
+    Keeps a content hash of the item's URL, title and description and the
+    time it was last verified. A run only needs to process items that are
+    new, were edited since (their hash no longer matches), or were
+    verified longer than `max_age` seconds ago. Rechecking a stale item
+    revalidates its cached responses (ETag/Last-Modified) in the response
+    cache, so nothing is kept here for that.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS item_state (
+                item_id TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                last_verified REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, item_id):
+        """Return {'content_hash', 'last_verified'} or None"""
+        row = self._db.execute(
+            "SELECT content_hash, last_verified FROM item_state WHERE item_id = ?",
+            (item_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('content_hash', 'last_verified'), row))
+
+    def reason_to_check(self, item, max_age=DEFAULT_MAX_AGE):
+        """Return 'new', 'modified' or 'stale' if the item needs processing, else None"""
+        state = self.get(item['id'])
+        if state is None:
+            return 'new'
+        if state['content_hash'] != content_hash(item):
+            return 'modified'
+        if time.time() - state['last_verified'] >= max_age:
+            return 'stale'
+        return None
+
+    def mark_verified(self, item):
+        """Record that the item, as it is now, was just verified"""
+        # Columns named, so databases that still have the old validator columns work
+        self._db.execute(
+            "INSERT OR REPLACE INTO item_state (item_id, content_hash, last_verified) VALUES (?, ?, ?)",
+            (item['id'], content_hash(item), time.time())
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_JOURNAL_PATH = ".cache/job_journal.sqlite3"
+
+# Per-item statuses
+PENDING = 'pending'
+CHECKED = 'checked'
+REPLACED = 'replaced'
+FAILED = 'failed'
+
+# Statuses whose work doesn't need to be redone on --resume
+DONE_STATUSES = (CHECKED, REPLACED)
+
+class JobJournal:
+    """Durable per-item record of a maintenance job's progress
+
+    Each processed item gets its status, the result that was applied to
+    it (fetched metadata, new URL, ...) and how long it took. Rows are
+    committed as soon as they are recorded, so after an interruption a
+    resumed run can reapply finished results without any network work.
+    """
+
+    def __init__(self, job, path=DEFAULT_JOURNAL_PATH, resume=False):
+        self.job = job
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS journal (
+                job TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                elapsed REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job, item_id)
+            )
+        """)
+        if not resume:
+            # A fresh run starts from an empty journal for this job
+            self._db.execute("DELETE FROM journal WHERE job = ?", (job,))
+        self._db.commit()
+
+    def entry(self, item_id):
+        """Return {'status', 'result', 'elapsed'} for an item, or None"""
+        row = self._db.execute(
+            "SELECT status, result, elapsed FROM journal WHERE job = ? AND item_id = ?",
+            (self.job, item_id)
+        ).fetchone()
+        if row is None:
+            return None
+        status, result, elapsed = row
+        return {'status': status, 'result': json.loads(result) if result else None, 'elapsed': elapsed}
+
+    def completed(self, item_id):
+        """Return the finished entry for an item, or None if it still needs work"""
+        entry = self.entry(item_id)
+        if entry and entry['status'] in DONE_STATUSES:
+            return entry
+        return None
+
+    def record(self, item_id, status, result=None, elapsed=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO journal VALUES (?, ?, ?, ?, ?, ?)",
+            (self.job, item_id, status, json.dumps(result) if result is not None else None, elapsed, time.time())
+        )
+        self._db.commit()
+
+    def summary(self):
+        """Return {status: count} for this job"""
+        rows = self._db.execute(
+            "SELECT status, COUNT(*) FROM journal WHERE job = ? GROUP BY status", (self.job,)
+        ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import json
+import os
+import pickle
+import threading
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maintenance_data.json")
+DEFAULT_SNAPSHOT_PATH = ".cache/maintenance_data.pickle"
+
+DATA_VERSION = 1
+
+# Bumped whenever the compiled layout below changes, so old snapshots are rebuilt
+SNAPSHOT_VERSION = 1
+
+def compile_data(raw):
+    """Turn the parsed JSON into the plain lookup tables MaintenanceData wraps"""
+    if raw.get('version') != DATA_VERSION:
+        raise ValueError(f"Unsupported maintenance data version: {raw.get('version')}")
+    compiled = {
+        'emotion_phrases': {emotion: tuple(phrases) for emotion, phrases in raw['emotion_phrases'].items()},
+        'default_phrases': tuple(raw['default_phrases']),
+        'fallback_urls': dict(raw.get('fallback_urls', {})),
+        'candidates': {},
+        'entries': {},
+    }
+    for emotion, by_type in raw['replacements'].items():
+        for content_type, entries in by_type.items():
+            compiled['candidates'][(emotion, content_type)] = tuple(entry['url'] for entry in entries)
+            compiled['entries'][(emotion, content_type)] = {entry['url']: entry for entry in entries}
+    return compiled
+
+class MaintenanceData:
+    """Replacement pools and description phrases, compiled for lookups
+
+    Wraps the tables compile_data() builds from maintenance_data.json:
+    per-emotion phrase tuples, the replacement candidates of every
+    (emotion, type) in order (with each type's fallback URL last) and
+    each candidate's entry within its pool.
+    """
+
+    def __init__(self, compiled):
+        self.emotion_phrases = compiled['emotion_phrases']
+        self.default_phrases = compiled['default_phrases']
+        self.fallback_urls = compiled['fallback_urls']
+        self.entries = compiled['entries']
+        self._candidates = compiled['candidates']
+
+    def phrases(self, emotion):
+        return self.emotion_phrases.get(emotion, self.default_phrases)
+
+    def pairs(self):
+        """Return every (emotion, type) with replacement candidates"""
+        return list(self._candidates)
+
+    def candidates(self, emotion, content_type):
+        """Return the replacement URLs for an (emotion, type), best first"""
+        urls = self._candidates.get((emotion, content_type), ())
+        fallback = self.fallback_urls.get(content_type)
+        if fallback and fallback not in urls:
+            urls += (fallback,)
+        return list(urls)
+
+    def candidate_table(self, content_type=None, emotions=None):
+        """Return {(emotion, type): [urls]}, optionally for one type and for some emotions
+
+        Emotions given without a list of their own get just the type's fallback URL.
+        """
+        pairs = set(self._candidates)
+        if emotions is not None and content_type is not None:
+            pairs |= {(emotion, content_type) for emotion in emotions}
+        return {
+            (emotion, ctype): self.candidates(emotion, ctype)
+            for emotion, ctype in sorted(pairs)
+            if (content_type is None or ctype == content_type) and (emotions is None or emotion in emotions)
+        }
+
+    def entry(self, emotion, content_type, url):
+        """Return a candidate's entry ({'url', optional 'title', 'description', 'note'}), or None"""
+        return self.entries.get((emotion, content_type), {}).get(url)
+
+def _source_key(path):
+    stat = os.stat(path)
+    return (SNAPSHOT_VERSION, os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+def load_data(path=DEFAULT_DATA_PATH, snapshot_path=DEFAULT_SNAPSHOT_PATH):
+    """Load the maintenance data, from the compiled snapshot when the file hasn't changed
+
+    The JSON is parsed and compiled only when the snapshot is missing or
+    was made from a different version of the file (by mtime and size).
+    """
+    key = _source_key(path)
+    if snapshot_path:
+        try:
+            with open(snapshot_path, 'rb') as f:
+                snapshot_key, compiled = pickle.load(f)
+            if snapshot_key == key:
+                return MaintenanceData(compiled)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            pass
+
+    with open(path) as f:
+        compiled = compile_data(json.load(f))
+
+    if snapshot_path:
+        try:
+            directory = os.path.dirname(snapshot_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump((key, compiled), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, snapshot_path)
+        except OSError as e:
+            print(f"Could not write maintenance data snapshot: {e}")
+    return MaintenanceData(compiled)
+
+_default_data = None
+_default_data_lock = threading.Lock()
+
+def get_default_data():
+    """Return the process-wide data loaded from DEFAULT_DATA_PATH"""
+    global _default_data
+    if _default_data is None:
+        with _default_data_lock:
+            if _default_data is None:
+                _default_data = load_data()
+    return _default_data
+
+if __name__ == "__main__":
+    data = get_default_data()
+    pairs = data.pairs()
+    urls = {url for pair in pairs for url in data.candidates(*pair)}
+    print(f"{len(urls)} replacement candidates in {len(pairs)} emotion/type pools, "
+          f"{sum(len(p) for p in data.emotion_phrases.values())} phrases for {len(data.emotion_phrases)} emotions")
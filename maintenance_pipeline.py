@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+import argparse
+import http_client
+import instrumentation
+from concurrent.futures import ThreadPoolExecutor
+from article_fetcher import fetch_articles
+from build_catalog_index import build_index, write_binary_index, write_json_index
+from catalog_index import CatalogIndex
+from catalog_io import load_catalog, write_catalog
+from check_youtube_videos import check_youtube_videos
+from content_metadata import get_metadata, get_spotify_metadata_batch
+from descriptions import create_emotion_descriptions, keeps_description
+from maintenance_data import get_default_data
+from replacement_pool import ReplacementPool
+from replacement_warmup import ReplacementWarmer
+from url_canonical import canonicalize_url, fingerprint, get_spotify_track_id, get_youtube_video_id
+from url_checker import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, check_url_liveness, is_broken, is_skipped
+
+JSON_FILE_PATH = "SentimentSync/Resources/ContentData.json"
+
+# Content types whose URLs are checked and refreshed
+MAINTAINED_TYPES = ['video', 'song', 'article']
+
+class PipelineContext:
+    """State shared by every stage of one pipeline run
+
+    One in-memory catalog, one index over it, and per-run memo tables, so
+    each URL is fetched at most once (the HTTP client and its on-disk
+    response cache are shared process-wide through http_client).
+    """
+
+    def __init__(self, json_file_path=JSON_FILE_PATH, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST):
+        self.json_file_path = json_file_path
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.content_data = []
+        self.index = None
+        # item id -> reason ('duplicate' or 'broken') for items that need a new URL
+        self.needs_replacement = {}
+        # url fingerprint -> True/False liveness for this run
+        self.alive = {}
+        # url fingerprint -> metadata dict (or None) for this run
+        self.metadata = {}
+        self.changed = set()
+        # Replacement candidates checked (in the background) for this run
+        self.warmer = None
+
+    def maintained_items(self):
+        return [item for item in self.content_data if item['type'] in MAINTAINED_TYPES]
+
+def stage_load(ctx):
+    """Read the catalog once"""
+    ctx.content_data = load_catalog(ctx.json_file_path)
+    print(f"Loaded {len(ctx.content_data)} items from {ctx.json_file_path}")
+
+def stage_canonicalize(ctx):
+    """Rewrite YouTube and Spotify URLs to their canonical form and index the catalog"""
+    rewritten = 0
+    for item in ctx.content_data:
+        url = item['url']
+        if get_youtube_video_id(url) or get_spotify_track_id(url):
+            canonical = canonicalize_url(url)
+            if canonical != url:
+                item['url'] = canonical
+                ctx.changed.add(item['id'])
+                rewritten += 1
+    ctx.index = CatalogIndex(ctx.content_data)
+    print(f"Canonicalized {rewritten} URLs")
+
+def stage_dedup(ctx):
+    """Mark every occurrence of a URL after the first for replacement"""
+    duplicates = ctx.index.duplicate_urls(types=MAINTAINED_TYPES)
+    for items in duplicates.values():
+        for item in items[1:]:
+            ctx.needs_replacement[item['id']] = 'duplicate'
+    print(f"Found {len(duplicates)} duplicate URLs")
+
+def _fetch_probe(kinds):
+    def probe(url):
+        try:
+            # A cached GET, so the metadata stage can reuse the body without refetching
+            return http_client.fetch(url, kind=kinds.get(url, 'default'), timeout=10).status_code, None
+        except Exception as e:
+            return None, e
+    return probe
+
+def _check_liveness(ctx, items):
+    """Fill ctx.alive for the given items' URLs that weren't checked yet
+
+    URLs on domains whose circuit is open get None: neither alive nor dead.
+    """
+    videos = {}
+    songs = {}
+    articles = []
+    others = {}
+    for item in items:
+        key = fingerprint(item['url'])
+        if key in ctx.alive:
+            continue
+        video_id = get_youtube_video_id(item['url'])
+        if video_id:
+            videos[key] = video_id
+        elif get_spotify_track_id(item['url']):
+            songs[key] = item['url']
+        elif item['type'] == 'article':
+            articles.append(item['url'])
+        else:
+            others[item['url']] = item['type']
+
+    if videos:
+        status = check_youtube_videos(videos.values(), concurrency=ctx.concurrency, use_cache=True)
+        for key, video_id in videos.items():
+            ctx.alive[key] = status[video_id]
+    if songs:
+        # The oEmbed lookup that gives a track's metadata doubles as its liveness check
+        found = get_spotify_metadata_batch(songs.values(), concurrency=ctx.concurrency)
+        for key, url in songs.items():
+            if url in found:
+                ctx.alive[key] = found[url] is not None
+                ctx.metadata[key] = found[url]
+            else:
+                ctx.alive[key] = None
+    if articles:
+        # One GET per article gives both liveness and metadata; parsing runs in a process pool
+        for url, result in fetch_articles(articles, io_workers=ctx.concurrency).items():
+            ctx.alive[fingerprint(url)] = None if result['skipped'] else result['ok']
+            ctx.metadata[fingerprint(url)] = result['metadata']
+    if others:
+        results = check_url_liveness(others, concurrency=ctx.concurrency, per_host=ctx.per_host,
+                                     probe=_fetch_probe(others))
+        for url, result in results.items():
+            ctx.alive[fingerprint(url)] = None if is_skipped(result) else not is_broken(result)
+
+def stage_liveness(ctx):
+    """Check every maintained URL once and mark dead ones for replacement"""
+    items = ctx.maintained_items()
+    _check_liveness(ctx, items)
+    broken = 0
+    for item in items:
+        if ctx.alive[fingerprint(item['url'])] is False:
+            ctx.needs_replacement.setdefault(item['id'], 'broken')
+            broken += 1
+    print(f"Found {broken} broken URLs")
+
+def replacement_candidates(emotion, content_type):
+    """Return every known replacement URL for an (emotion, type) pair, best first"""
+    return get_default_data().candidates(emotion, content_type)
+
+def all_replacement_candidates():
+    """Return {url: content_type} for every replacement candidate"""
+    return {url: content_type for (_, content_type), urls in get_default_data().candidate_table().items()
+            for url in urls}
+
+def stage_warm(ctx):
+    """Start checking every replacement candidate, and fetching its metadata, in the background"""
+    ctx.warmer = ReplacementWarmer(all_replacement_candidates(), workers=ctx.concurrency)
+    ctx.warmer.start()
+    print(f"Warming {len(ctx.warmer.candidates)} replacement candidates in the background")
+
+def stage_replace(ctx):
+    """Give every marked item an unused, live replacement URL"""
+    if ctx.warmer is None:
+        ctx.warmer = ReplacementWarmer(workers=ctx.concurrency)
+    items = [(ctx.index.items_by_id[item_id], reason) for item_id, reason in ctx.needs_replacement.items()]
+    pairs = {(item['emotion'], item['type']) for item, _ in items}
+    pool = ReplacementPool({pair: replacement_candidates(*pair) for pair in pairs}, ctx.index,
+                           validate=ctx.warmer.validate)
+    # Waits for the warm-up, then checks any candidate it didn't cover
+    pool.prevalidate()
+
+    replaced = 0
+    for item, reason in items:
+        new_url = pool.take(item['emotion'], item['type'])
+        if new_url is None:
+            print(f"Warning: no unused live replacement for {reason} {item['emotion']} {item['type']}: {item['title']}")
+            continue
+        print(f"Replacing {reason} {item['type']} ({item['emotion']}): {item['url']} -> {new_url}")
+        ctx.index.set_url(item, new_url)
+        ctx.metadata[fingerprint(new_url)] = ctx.warmer.metadata(new_url)
+        ctx.changed.add(item['id'])
+        replaced += 1
+    print(f"Replaced {replaced} of {len(ctx.needs_replacement)} URLs")
+
+def stage_metadata(ctx):
+    """Fetch metadata once per distinct URL, concurrently"""
+    pending = {}
+    for item in ctx.maintained_items():
+        key = fingerprint(item['url'])
+        if key not in ctx.metadata:
+            pending.setdefault(key, (item['url'], item['type']))
+
+    with ThreadPoolExecutor(max_workers=ctx.concurrency) as executor:
+        results = executor.map(lambda entry: get_metadata(*entry), pending.values())
+        for key, metadata in zip(pending, results):
+            ctx.metadata[key] = metadata
+    print(f"Fetched metadata for {len(pending)} URLs")
+
+def stage_describe(ctx):
+    """Apply fetched titles and emotion-aware descriptions"""
+    described = [(item, ctx.metadata.get(fingerprint(item['url']))) for item in ctx.maintained_items()]
+    described = [(item, metadata) for item, metadata in described
+                 if metadata and not keeps_description(item, metadata)]
+    descriptions = create_emotion_descriptions(
+        (metadata, item['emotion'], item['type']) for item, metadata in described
+    )
+
+    updated = 0
+    for (item, metadata), new_description in zip(described, descriptions):
+        old = (item['title'], item['description'])
+        if metadata.get('title'):
+            item['title'] = metadata['title']
+        if new_description:
+            item['description'] = new_description
+        if (item['title'], item['description']) != old:
+            ctx.changed.add(item['id'])
+            updated += 1
+    print(f"Updated titles or descriptions for {updated} items")
+
+def stage_write(ctx):
+    """Write the catalog once, if anything changed"""
+    if ctx.changed:
+        write_catalog(ctx.json_file_path, ctx.content_data)
+        print(f"Wrote {len(ctx.changed)} changed items to {ctx.json_file_path}")
+    else:
+        print("No changes to write")
+
+def stage_index(ctx):
+    """Rebuild the app's precomputed emotion/type index from the catalog"""
+    index = build_index(ctx.content_data)
+    write_json_index(index)
+    write_binary_index(index)
+    print(f"Indexed {len(index['items'])} items in {len(index['slices'])} emotion/type slices")
+
+STAGES = {
+    'load': stage_load,
+    'canonicalize': stage_canonicalize,
+    'warm': stage_warm,
+    'dedup': stage_dedup,
+    'liveness': stage_liveness,
+    'replace': stage_replace,
+    'metadata': stage_metadata,
+    'describe': stage_describe,
+    'write': stage_write,
+    'index': stage_index,
+}
+
+def run_pipeline(stages=None, **kwargs):
+    """Run the named stages (all of them by default) in pipeline order"""
+    selected = set(stages or STAGES)
+    # Later stages depend on the loaded, indexed catalog
+    selected |= {'load', 'canonicalize'}
+    unknown = selected - set(STAGES)
+    if unknown:
+        raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+
+    ctx = PipelineContext(**kwargs)
+    for name, stage in STAGES.items():
+        if name in selected:
+            print(f"\n== {name} ==")
+            with instrumentation.stage(f"pipeline.{name}"):
+                stage(ctx)
+    if ctx.warmer is not None:
+        # Let a warm-up that nothing waited for finish, so its results are kept
+        ctx.warmer.close()
+    return ctx
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run catalog maintenance in a single pass over ContentData.json")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help="comma-separated stages to run, in pipeline order")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="maximum number of requests in flight")
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help="maximum number of requests in flight against one host")
+    instrumentation.add_metrics_argument(parser)
+    args = parser.parse_args()
+    instrumentation.export_at_exit(args.metrics)
+
+    run_pipeline(
+        stages=[name.strip() for name in args.stages.split(',') if name.strip()],
+        concurrency=args.concurrency,
+        per_host=args.per_host
+    )
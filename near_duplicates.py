@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import hashlib
+import re
+from array import array
+from collections import defaultdict
+from instrumentation import stage
+
+# Minimum Jaccard similarity of shingle sets for two items to count as duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# Number of MinHash permutations per signature
+DEFAULT_NUM_PERM = 128
+
+# Character shingle length used on normalized titles and descriptions
+SHINGLE_SIZE = 4
+
+_MAX_HASH = (1 << 32) - 1
+
+# Shingle hash vectors kept by a MinHasher before its memo is cleared
+MAX_MEMOIZED_SHINGLES = 1 << 16
+
+def item_text(item):
+    """Return the text an item is compared on: its title and description"""
+    return f"{item.get('title', '')} {item.get('description', '')}"
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Return the set of character shingles of lowercased, punctuation-free text"""
+    normalized = ' '.join(re.findall(r'\w+', text.lower()))
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+def jaccard(a, b):
+    if not a and not b:
+        # Two items with no text aren't evidence of anything
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def choose_bands(num_perm, threshold):
+    """Pick (bands, rows) whose LSH S-curve crosses closest to the threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        crossing = (1 / bands) ** (1 / rows)
+        error = abs(crossing - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures
+
+    A shingle's values under all `num_perm` hash functions come from one
+    seeded SHAKE-128 digest read as 32-bit integers, and the minimum of
+    each position over an item's shingles is taken by min() over zip(),
+    so no per-permutation arithmetic runs in Python. Shingle vectors are
+    memoized, since items share most of their shingles.
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        self.num_perm = num_perm
+        self._prefix = f"{seed}:".encode('utf-8')
+        self._vectors = {}
+
+    def _vector(self, shingle):
+        vector = self._vectors.get(shingle)
+        if vector is None:
+            if len(self._vectors) >= MAX_MEMOIZED_SHINGLES:
+                self._vectors.clear()
+            digest = hashlib.shake_128(self._prefix + shingle.encode('utf-8')).digest(4 * self.num_perm)
+            vector = self._vectors[shingle] = array('I', digest)
+        return vector
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(map(min, zip(*map(self._vector, shingle_set))))
+
+def _find(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+@stage('dedup')
+def find_near_duplicate_groups(items, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                               partition=lambda item: item['type']):
+    """Group items whose titles and descriptions are near-identical
+
+    Items are only compared within the same partition (by default their
+    content type). Candidate pairs come from LSH buckets over MinHash
+    signatures of title plus description, and are confirmed when both
+    that text and the titles alone reach the threshold in exact Jaccard
+    similarity, so shared boilerplate descriptions don't merge
+    unrelated items.
+    Returns a list of groups, each a list of two or more items in their
+    original order.
+    """
+    items = list(items)
+    bands, rows = choose_bands(num_perm, threshold)
+    # Only the permutations that make up whole bands are used
+    hasher = MinHasher(bands * rows)
+
+    shingle_sets = [shingles(item_text(item)) for item in items]
+    title_sets = [shingles(item.get('title', '')) for item in items]
+    buckets = defaultdict(list)
+    for position, (item, shingle_set) in enumerate(zip(items, shingle_sets)):
+        if not shingle_set:
+            # Nothing to compare on; such items are never near-duplicates
+            continue
+        signature = hasher.signature(shingle_set)
+        for band in range(bands):
+            key = (partition(item), band, signature[band * rows:(band + 1) * rows])
+            buckets[key].append(position)
+
+    parent = list(range(len(items)))
+    compared = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                if (first, second) in compared:
+                    continue
+                compared.add((first, second))
+                # Titles first: their shingle sets are much smaller. Two untitled
+                # items are compared on their descriptions alone.
+                titles_match = ((not title_sets[first] and not title_sets[second])
+                                or jaccard(title_sets[first], title_sets[second]) >= threshold)
+                if titles_match and jaccard(shingle_sets[first], shingle_sets[second]) >= threshold:
+                    parent[_find(parent, second)] = _find(parent, first)
+
+    groups = defaultdict(list)
+    for position in range(len(items)):
+        groups[_find(parent, position)].append(items[position])
+    return [group for group in groups.values() if len(group) > 1]
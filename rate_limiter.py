@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Requests per second and burst size used for hosts without their own entry
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 2
+
+# Per-host (rate, burst) overrides keyed on urlparse(url).netloc
+DOMAIN_RATES = {
+    'www.youtube.com': (5.0, 5),
+    'youtube.com': (5.0, 5),
+    'open.spotify.com': (5.0, 5),
+    'www.psychologytoday.com': (1.0, 1),
+    'www.mayoclinic.org': (1.0, 1),
+}
+
+# Longest Retry-After we are willing to honor, in seconds
+MAX_RETRY_AFTER = 120
+
+def parse_retry_after(value):
+    """Return the number of seconds a Retry-After header asks us to wait"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(int(value), MAX_RETRY_AFTER)
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+    return min(max(delay, 0), MAX_RETRY_AFTER)
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out waits instead of blocking itself
+
+    `tokens` is the balance as of `updated`, which block_for() can push
+    into the future; a negative balance is debt owed by callers already
+    told to wait.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait for it"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = self.updated - now
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def block_for(self, seconds):
+        """Refuse to hand out tokens without waiting for the next `seconds`
+
+        Nothing refills during the block and at most one token is ready when
+        it ends, so queued callers leave `1 / rate` apart instead of all at once.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            until = now + seconds
+            if until > self.updated:
+                self.tokens = min(self.tokens, 1)
+                self.updated = until
+
+class RateLimiter:
+    """Per-host token buckets shared by every checker and fetcher"""
+
+    def __init__(self, domain_rates=None, default_rate=DEFAULT_RATE, default_burst=DEFAULT_BURST):
+        self.domain_rates = dict(DOMAIN_RATES, **(domain_rates or {}))
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._buckets:
+                rate, burst = self.domain_rates.get(host, (self.default_rate, self.default_burst))
+                self._buckets[host] = TokenBucket(rate, burst)
+            return self._buckets[host]
+
+    def acquire(self, url):
+        """Block until a request to the URL's host is allowed; return the time slept"""
+        wait = self.bucket(url).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def defer(self, url, seconds):
+        """Hold back every request to the URL's host for `seconds`"""
+        self.bucket(url).block_for(seconds)
+
+_default_limiter = RateLimiter()
+
+def get_default_limiter():
+    """Return the process-wide rate limiter"""
+    return _default_limiter
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+from collections import Counter, deque
+from url_canonical import fingerprint
+from url_checker import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, check_url_liveness, is_broken, is_skipped
+
+def probe_alive(candidates, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST):
+    """Return the candidate URLs that answer a liveness probe
+
+    `candidates` maps each URL to its content type. URLs on domains that
+    are currently failing count as not alive.
+    """
+    results = check_url_liveness(candidates, concurrency=concurrency, per_host=per_host)
+    return {url for url, result in results.items() if not is_broken(result) and not is_skipped(result)}
+
+class ReplacementPool:
+    """Unused, live replacement URLs per (emotion, type), handed out in O(1)
+
+    Built once per run from the replacement tables and a CatalogIndex of
+    the catalog. Each (emotion, type) gets a free-list of its candidates,
+    de-duplicated by canonical identity and without the URLs the catalog
+    already uses. The first time a pair is asked for (or for every pair at
+    once with prevalidate()), the whole free-list is checked in one
+    concurrent batch with `validate` and dead candidates are dropped.
+
+    take() pops the next candidate, skipping any that got used since, and
+    never invents one: when a pair runs out it returns None and counts the
+    shortfall in `exhausted`.
+    """
+
+    def __init__(self, candidates, index, validate=probe_alive):
+        self.index = index
+        self.validate = validate
+        self.exhausted = Counter()
+        self._free = {}
+        self._pending = set()
+        self._taken = set()
+        for (emotion, content_type), urls in candidates.items():
+            unique = {}
+            for url in urls:
+                unique.setdefault(fingerprint(url), url)
+            self._free[(emotion, content_type)] = deque(
+                url for key, url in unique.items() if key not in index.used_fingerprints
+            )
+            self._pending.add((emotion, content_type))
+
+    def prevalidate(self, pairs=None):
+        """Check the candidates of the given (or every) pair now, in a single batch"""
+        pending = self._pending if pairs is None else self._pending.intersection(pairs)
+        self._validate(list(pending))
+
+    def _validate(self, pairs):
+        self._pending.difference_update(pairs)
+        if self.validate is None:
+            return
+        candidates = {url: content_type for emotion, content_type in pairs
+                      for url in self._free.get((emotion, content_type), ())}
+        if not candidates:
+            return
+        alive = self.validate(candidates)
+        for pair in pairs:
+            free = self._free.get(pair)
+            if free:
+                self._free[pair] = deque(url for url in free if url in alive)
+
+    def take(self, emotion, content_type):
+        """Return an unused live replacement URL for the pair and reserve it, or None"""
+        pair = (emotion, content_type)
+        if pair in self._pending:
+            self._validate([pair])
+        free = self._free.get(pair, ())
+        while free:
+            url = free.popleft()
+            key = fingerprint(url)
+            if key in self._taken or key in self.index.used_fingerprints:
+                continue
+            self._taken.add(key)
+            return url
+        self.exhausted[pair] += 1
+        return None
+
+    def report(self):
+        """Print the pairs that ran out of replacements, if any"""
+        for (emotion, content_type), count in sorted(self.exhausted.items()):
+            print(f"Ran out of replacement {content_type} URLs for {emotion}; {count} left unreplaced")
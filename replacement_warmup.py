@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from article_fetcher import fetch_articles
+from content_metadata import get_metadata
+from instrumentation import stage
+from url_checker import is_broken, is_skipped, probe_url
+
+DEFAULT_WARM_PATH = ".cache/replacement_warm.sqlite3"
+
+# Seconds a candidate's liveness and metadata are trusted before it is checked again
+DEFAULT_WARM_TTL = 24 * 3600
+
+# Candidates checked at once during warm-up
+DEFAULT_WARM_WORKERS = 16
+
+# Content types whose replacements are only usable with their title and description
+METADATA_TYPES = ('video', 'song', 'article')
+
+def check_candidate(url, content_type):
+    """Return (usable, metadata) for a non-article candidate, or None if its domain is down"""
+    metadata = get_metadata(url, content_type)
+    if metadata:
+        return True, metadata
+    result = probe_url(url)
+    if is_skipped(result):
+        return None
+    return content_type not in METADATA_TYPES and not is_broken(result), None
+
+class ReplacementWarmer:
+    """Known-good replacement candidates with their metadata, persisted with a TTL
+
+    warm() checks every candidate that wasn't checked in the last `ttl`
+    seconds, concurrently, fetching its metadata with the same request
+    (one streamed GET per article, one oEmbed or page lookup per video or
+    song). start() does this in a background thread so it overlaps the
+    rest of the run. validate() waits for it and is meant to be passed to
+    ReplacementPool, so only usable candidates are handed out; metadata()
+    then returns a replacement's title and description without a request.
+    Candidates on domains that are currently failing are left unknown and
+    checked again next time.
+    """
+
+    def __init__(self, candidates=None, path=DEFAULT_WARM_PATH, ttl=DEFAULT_WARM_TTL, workers=DEFAULT_WARM_WORKERS):
+        self.candidates = dict(candidates or {})
+        self.ttl = ttl
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._thread = None
+        # url -> (usable, metadata, checked_at)
+        self._entries = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                url TEXT PRIMARY KEY,
+                content_type TEXT NOT NULL,
+                usable INTEGER NOT NULL,
+                metadata TEXT,
+                checked_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+        for url, usable, metadata, checked_at in self._db.execute(
+                "SELECT url, usable, metadata, checked_at FROM candidates"):
+            self._entries[url] = (bool(usable), json.loads(metadata) if metadata else None, checked_at)
+
+    def _is_fresh(self, url):
+        entry = self._entries.get(url)
+        return entry is not None and time.time() - entry[2] < self.ttl
+
+    @stage('warmup')
+    def warm(self, candidates=None):
+        """Check the candidates ({url: content_type}) not checked within the TTL; returns how many"""
+        candidates = self.candidates if candidates is None else candidates
+        with self._lock:
+            stale = {url: content_type for url, content_type in candidates.items() if not self._is_fresh(url)}
+        if not stale:
+            return 0
+
+        results = {}
+        articles = [url for url, content_type in stale.items() if content_type == 'article']
+        if articles:
+            for url, result in fetch_articles(articles, io_workers=self.workers).items():
+                if not result['skipped']:
+                    results[url] = (result['ok'] and result['metadata'] is not None, result['metadata'])
+        others = {url: content_type for url, content_type in stale.items() if content_type != 'article'}
+        if others:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for url, result in zip(others, executor.map(check_candidate, others, others.values())):
+                    if result is not None:
+                        results[url] = result
+
+        now = time.time()
+        with self._lock:
+            for url, (usable, metadata) in results.items():
+                self._entries[url] = (usable, metadata, now)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO candidates VALUES (?, ?, ?, ?, ?)",
+                [(url, stale[url], int(usable), json.dumps(metadata) if metadata else None, now)
+                 for url, (usable, metadata) in results.items()]
+            )
+            self._db.commit()
+        return len(stale)
+
+    def _warm_in_background(self):
+        try:
+            self.warm()
+        except Exception as e:
+            # validate() checks whatever is still missing
+            print(f"Replacement warm-up failed: {e}")
+
+    def start(self):
+        """Warm every candidate in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._warm_in_background, daemon=True)
+            self._thread.start()
+
+    def wait(self):
+        """Block until the background warm-up, if any, has finished"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def validate(self, candidates):
+        """ReplacementPool validator: return the usable URLs among {url: content_type}"""
+        self.wait()
+        # Anything the warm-up didn't cover, or that expired since, is checked now
+        self.warm(candidates)
+        with self._lock:
+            return {url for url in candidates if url in self._entries and self._entries[url][0]}
+
+    def metadata(self, url):
+        """Return the warmed metadata of a candidate, or None"""
+        with self._lock:
+            entry = self._entries.get(url)
+        return entry[1] if entry else None
+
+    def close(self):
+        self.wait()
+        self._db.close()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import json
+import os
+import sqlite3
+import threading
+import time
+from url_canonical import normalize_url
+
+DEFAULT_CACHE_PATH = ".cache/http_cache.sqlite3"
+
+# Total body bytes kept on disk before least-recently-used entries are evicted
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# How long (seconds) a cached response is served without revalidation, by content kind
+TTL_BY_KIND = {
+    'oembed': 7 * 24 * 3600,
+    'youtube-status': 24 * 3600,
+    'song': 7 * 24 * 3600,
+    'spotify-oembed': 7 * 24 * 3600,
+    'article': 24 * 3600,
+    'default': 24 * 3600,
+}
+
+class StoredResponse:
+    """Minimal stand-in for requests.Response built from already-downloaded bytes"""
+
+    def __init__(self, url, status_code, headers, content, fetched_at, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.fetched_at = fetched_at
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+class ResponseCache:
+    """SQLite-backed HTTP response cache with per-kind TTLs and LRU eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl_by_kind=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_by_kind = dict(TTL_BY_KIND, **(ttl_by_kind or {}))
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._db.commit()
+
+    def ttl(self, kind):
+        return self.ttl_by_kind.get(kind, self.ttl_by_kind['default'])
+
+    def lookup(self, url):
+        """Return (StoredResponse, kind, etag, last_modified) or None"""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, kind, status, headers, body, etag, last_modified, fetched_at FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        cached_url, kind, status, headers, body, etag, last_modified, fetched_at = row
+        response = StoredResponse(cached_url, status, json.loads(headers), body, fetched_at, from_cache=True)
+        return response, kind, etag, last_modified
+
+    def is_fresh(self, response, kind):
+        return time.time() - response.fetched_at < self.ttl(kind)
+
+    def store(self, url, response, kind='default'):
+        """Store a response's status, headers and body under the URL's cache key"""
+        body = response.content or b''
+        headers = dict(response.headers)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), response.url or url, kind, response.status_code, json.dumps(headers),
+                 body, len(body), headers.get('ETag'), headers.get('Last-Modified'), now, now)
+            )
+            self._db.commit()
+        self.evict()
+
+    def mark_revalidated(self, url):
+        """Reset the freshness clock after a 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, last_access = ? WHERE key = ?",
+                (now, now, normalize_url(url))
+            )
+            self._db.commit()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes"""
+        with self._lock:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_cache():
+    """Return the process-wide cache stored at DEFAULT_CACHE_PATH"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,34 @@
+import pytest
+from article_fetcher import MetadataSeen
+from content_metadata import parse_article_body
+
+HEAD = b'<html><head><title>Page</title><meta name="description" content="About calm."></head>'
+FILLER = b'<div>' + b'x' * 5000 + b'</div>'
+
+def stream(page, chunk_size):
+    """Feed the page to a fresh MetadataSeen in chunks; return the prefix read before it stopped"""
+    seen = MetadataSeen()
+    read = b''
+    for start in range(0, len(page), chunk_size):
+        chunk = page[start:start + chunk_size]
+        read += chunk
+        if seen(chunk):
+            break
+    return read
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1024])
+def test_stops_after_title_and_description(chunk_size):
+    page = HEAD + b'<body>' + FILLER + b'<h1>Breathe</h1>' + FILLER * 20 + b'</body></html>'
+    prefix = stream(page, chunk_size)
+    assert len(prefix) < len(page) // 10
+    assert parse_article_body(prefix)[0] == parse_article_body(page)[0]
+
+def test_paragraph_counts_as_a_description():
+    page = b'<html><body><h1>Title</h1><p>First paragraph.</p>' + FILLER * 20
+    prefix = stream(page, 64)
+    assert len(prefix) < len(page)
+    assert parse_article_body(prefix)[0] == {'title': 'Title', 'description': 'First paragraph.'}
+
+def test_reads_on_without_a_title():
+    page = HEAD + b'<body>' + FILLER * 3 + b'</body></html>'
+    assert stream(page, 64) == page
@@ -0,0 +1,51 @@
+import json
+import os
+import uuid
+import pytest
+from build_catalog_index import build_index, read_binary_index, write_binary_index, write_json_index
+
+def make_items():
+    rows = [('happy', 'video', 'Sunny', 'Bright'), ('sad', 'article', 'Rain', 'Shared'),
+            ('happy', 'video', 'Smile', 'Shared'), ('happy', 'song', 'Ünïcödé ✓', '')]
+    return [{'id': str(uuid.uuid5(uuid.NAMESPACE_URL, title)), 'emotion': emotion, 'type': content_type,
+             'title': title, 'description': description, 'url': f"https://example.com/{n}"}
+            for n, (emotion, content_type, title, description) in enumerate(rows)]
+
+def test_slices_group_items_and_strings_are_interned():
+    index = build_index(make_items())
+    assert index['emotions'] == ['happy', 'sad']
+    assert index['types'] == ['video', 'article', 'song']
+    assert [slice_[3] for slice_ in index['slices']] == [2, 1, 1]
+    assert index['strings'].count('Shared') == 1
+
+@pytest.mark.parametrize('emotion, content_type', [('happy', 'video'), ('sad', 'article'), ('happy', 'song')])
+def test_binary_round_trip(tmp_path, emotion, content_type):
+    items = make_items()
+    path = str(tmp_path / 'ContentIndex.bin')
+    write_binary_index(build_index(items), path)
+    expected = [item for item in items if (item['emotion'], item['type']) == (emotion, content_type)]
+    assert read_binary_index(path, emotion, content_type) == expected
+
+def test_missing_slice_reads_empty(tmp_path):
+    path = str(tmp_path / 'ContentIndex.bin')
+    write_binary_index(build_index(make_items()), path)
+    assert read_binary_index(path, 'sad', 'video') == []
+
+def test_json_index_matches_the_built_index(tmp_path):
+    index = build_index(make_items())
+    path = tmp_path / 'ContentIndex.json'
+    write_json_index(index, str(path))
+    assert json.loads(path.read_text()) == index
+
+def test_interrupted_write_keeps_the_previous_index(tmp_path):
+    path = tmp_path / 'ContentIndex.bin'
+    write_binary_index(build_index(make_items()), str(path))
+    before = path.read_bytes()
+
+    # Fails partway through, after the header and slices were written
+    index = build_index(make_items())
+    index['items'][-1][0] = 'not-a-uuid'
+    with pytest.raises(ValueError):
+        write_binary_index(index, str(path))
+    assert path.read_bytes() == before
+    assert os.listdir(tmp_path) == ['ContentIndex.bin']
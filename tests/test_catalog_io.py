@@ -0,0 +1,122 @@
+import io
+import json
+import os
+import pytest
+from catalog_io import (CatalogWriter, Checkpointer, _iter_json_array, iter_items, update_catalog, url_entry,
+                        write_catalog)
+
+ITEMS = [
+    {'id': '1', 'title': 'Brackets ] and, commas', 'description': 'A "quoted" [list]', 'type': 'article'},
+    {'id': '2', 'title': 'Ünïcödé ✓', 'description': '', 'type': 'song', 'tags': [1, {'a': None}]},
+    {'id': '3', 'title': 'x' * 500, 'description': 'long', 'type': 'video'},
+]
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 16, 64 * 1024])
+def test_streaming_parser_handles_any_chunk_boundary(chunk_size):
+    text = json.dumps(ITEMS, indent=4)
+    assert list(_iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == ITEMS
+
+@pytest.mark.parametrize('text', ['[]', '  [ ]  ', '[\n]'])
+def test_streaming_parser_empty_array(text):
+    assert list(_iter_json_array(io.StringIO(text))) == []
+
+@pytest.mark.parametrize('text', ['{"a": 1}', '[{"a": 1},', '[{"a": 1}'])
+def test_streaming_parser_rejects_malformed_catalogs(text):
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO(text), chunk_size=4))
+
+def test_write_matches_json_dump(tmp_path):
+    path = tmp_path / 'catalog.json'
+    assert write_catalog(str(path), iter(ITEMS)) == len(ITEMS)
+    assert path.read_text() == json.dumps(ITEMS, indent=4)
+    assert list(iter_items(str(path))) == ITEMS
+
+def test_write_empty_catalog_matches_json_dump(tmp_path):
+    path = tmp_path / 'catalog.json'
+    write_catalog(str(path), [])
+    assert path.read_text() == json.dumps([], indent=4)
+
+def test_jsonl_round_trip(tmp_path):
+    path = tmp_path / 'catalog.jsonl'
+    write_catalog(str(path), ITEMS)
+    assert len(path.read_text().splitlines()) == len(ITEMS)
+    assert list(iter_items(str(path))) == ITEMS
+
+def test_failed_write_leaves_the_catalog_untouched(tmp_path):
+    path = tmp_path / 'catalog.json'
+    write_catalog(str(path), ITEMS)
+    before = path.read_text()
+
+    def broken_items():
+        yield ITEMS[0]
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        write_catalog(str(path), broken_items())
+    assert path.read_text() == before
+    assert os.listdir(tmp_path) == ['catalog.json']
+
+def test_discarded_write_leaves_the_catalog_untouched(tmp_path):
+    path = tmp_path / 'catalog.json'
+    write_catalog(str(path), ITEMS)
+    before = path.read_text()
+    with CatalogWriter(str(path)) as writer:
+        writer.write(ITEMS[0])
+        writer.discard()
+    assert path.read_text() == before
+    assert os.listdir(tmp_path) == ['catalog.json']
+
+def test_update_catalog_changes_only_the_given_items(tmp_path):
+    path = tmp_path / 'catalog.json'
+    write_catalog(str(path), ITEMS)
+    assert update_catalog(str(path), {'2': {'url': 'https://example.com/new', 'title': 'New'}}) == 1
+    expected = [dict(item) for item in ITEMS]
+    expected[1].update(url='https://example.com/new', title='New')
+    assert path.read_text() == json.dumps(expected, indent=4)
+
+def test_url_entry_keeps_text_only_for_the_replaced_type():
+    item = {'id': '1', 'emotion': 'calm', 'type': 'song', 'url': 'u', 'title': 't', 'description': 'd', 'artist': 'a'}
+    assert url_entry(item, 'song') == {'id': '1', 'emotion': 'calm', 'type': 'song', 'url': 'u',
+                                       'title': 't', 'description': 'd'}
+    assert url_entry(item, 'video') == {'id': '1', 'emotion': 'calm', 'type': 'song', 'url': 'u'}
+
+def test_write_keeps_the_file_mode(tmp_path):
+    path = tmp_path / 'catalog.json'
+    path.write_text('[]')
+    os.chmod(path, 0o664)
+    write_catalog(str(path), ITEMS)
+    assert os.stat(path).st_mode & 0o777 == 0o664
+
+def test_new_file_gets_the_umask_default(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        path = tmp_path / 'catalog.json'
+        write_catalog(str(path), ITEMS)
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+def test_checkpointer_without_interval_only_writes_on_flush():
+    writes = []
+    checkpoint = Checkpointer('unused.json', ITEMS, interval=None, write=writes.append)
+    for _ in range(1000):
+        checkpoint.tick(changed=True)
+    assert writes == []
+    checkpoint.flush()
+    assert writes == [ITEMS]
+
+def test_checkpointer_writes_once_the_interval_has_passed():
+    writes = []
+    checkpoint = Checkpointer('unused.json', ITEMS, interval=60, write=writes.append)
+    checkpoint.tick(changed=True)
+    assert writes == []
+    checkpoint.last_write -= 60
+    checkpoint.tick()
+    assert writes == [ITEMS]
+
+def test_checkpointer_skips_clean_catalogs():
+    writes = []
+    checkpoint = Checkpointer('unused.json', ITEMS, interval=0, write=writes.append)
+    checkpoint.tick()
+    checkpoint.flush()
+    assert writes == []
@@ -0,0 +1,58 @@
+import json
+import pytest
+from catalog_shards import MANIFEST_NAME, ShardedCatalog, merge_shards, split_catalog
+from catalog_io import load_catalog, write_catalog
+
+def make_items():
+    items = []
+    for n, (emotion, content_type) in enumerate([('happy', 'video'), ('sad', 'article'), ('happy', 'video'),
+                                                 ('happy', 'article'), ('sad', 'article'), ('happy', 'video')]):
+        items.append({'id': str(n), 'emotion': emotion, 'type': content_type, 'title': f"Item {n}"})
+    return items
+
+@pytest.fixture
+def sharded(tmp_path):
+    catalog = tmp_path / 'ContentData.json'
+    write_catalog(str(catalog), make_items())
+    shard_dir = tmp_path / 'shards'
+    split_catalog(str(catalog), str(shard_dir))
+    return catalog, shard_dir
+
+def test_split_then_merge_reproduces_the_catalog(sharded, tmp_path):
+    catalog, shard_dir = sharded
+    merged = tmp_path / 'merged.json'
+    merge_shards(str(shard_dir), str(merged))
+    assert merged.read_bytes() == catalog.read_bytes()
+
+def test_manifest_counts_and_files(sharded):
+    _, shard_dir = sharded
+    manifest = json.loads((shard_dir / MANIFEST_NAME).read_text())
+    counts = {(s['emotion'], s['type']): s['count'] for s in manifest['shards']}
+    assert counts == {('happy', 'video'): 3, ('sad', 'article'): 2, ('happy', 'article'): 1}
+    for shard in manifest['shards']:
+        assert len(load_catalog(str(shard_dir / shard['file']))) == shard['count']
+
+def test_load_filters_by_type_in_catalog_order(sharded):
+    _, shard_dir = sharded
+    articles = ShardedCatalog(str(shard_dir)).load(types=['article'])
+    assert [item['id'] for item in articles] == ['1', '3', '4']
+
+def test_writing_some_shards_keeps_the_others_and_the_order(sharded, tmp_path):
+    _, shard_dir = sharded
+    catalog = ShardedCatalog(str(shard_dir))
+    articles = catalog.load(types=['article'])
+    articles[0]['title'] = 'Edited'
+    # Drop one sad article and add a new happy one
+    articles = [a for a in articles if a['id'] != '4']
+    articles.append({'id': '9', 'emotion': 'happy', 'type': 'article', 'title': 'New'})
+    catalog.write(articles, types=['article'])
+
+    merged = tmp_path / 'merged.json'
+    merge_shards(str(shard_dir), str(merged))
+    items = load_catalog(str(merged))
+    assert [item['id'] for item in items] == ['0', '1', '2', '3', '5', '9']
+    assert items[1]['title'] == 'Edited'
+
+def test_missing_manifest_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ShardedCatalog(str(tmp_path))
@@ -0,0 +1,52 @@
+import pytest
+from content_metadata import ArticleMetadataParser, parse_article_metadata
+
+PAGE = ('<html><head><title>Tab title</title>'
+        '<meta name="description" content="Meta description.">'
+        '<meta property="og:description" content="OG description."></head>'
+        '<body><h1>Heading ✓</h1><p>First paragraph.</p>' + '<p>filler</p>' * 500 + '</body></html>').encode()
+
+def feed_in_chunks(page, chunk_size):
+    """Feed the page until the parser says it's done; return it with the bytes it read"""
+    parser = ArticleMetadataParser()
+    for start in range(0, len(page), chunk_size):
+        if parser.feed_bytes(page[start:start + chunk_size]):
+            break
+    return parser
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 64, 1 << 20])
+def test_chunked_parsing_matches_parsing_the_whole_page(chunk_size):
+    parser = feed_in_chunks(PAGE, chunk_size)
+    assert parser.result() == parse_article_metadata(PAGE.decode())
+    assert parser.result() == {'title': 'Heading ✓', 'description': 'Meta description.'}
+
+def test_stops_once_the_heading_and_meta_description_are_known():
+    parser = feed_in_chunks(PAGE, 64)
+    assert parser.done
+    assert parser.bytes_fed < PAGE.index(b'First paragraph') + 64
+
+def test_head_description_wins_over_the_first_paragraph():
+    html = '<html><head></head><body><h1>Title</h1><p>Intro.</p><meta name="description" content="Late."></body>'
+    parser = feed_in_chunks(html.encode(), 8)
+    # The head is closed, so the paragraph is the best description still to come
+    assert parser.done
+    assert parser.result() == {'title': 'Title', 'description': 'Intro.'}
+
+def test_keeps_reading_until_a_heading_appears():
+    html = b'<html><head><meta name="description" content="D"></head><body><p>x</p>' + b'<div>y</div>' * 50
+    parser = feed_in_chunks(html, 16)
+    assert not parser.done
+    assert parser.bytes_fed == len(html)
+
+def test_unclosed_paragraph_ends_at_the_next_heading():
+    assert parse_article_metadata('<body><p>intro<h1>Head</h1>') == {'title': 'Head', 'description': 'intro'}
+
+def test_title_fallbacks():
+    assert parse_article_metadata('<head><title>Tab</title><meta property="og:title" content="OG"></head>')['title'] == 'OG'
+    assert parse_article_metadata('<head><title>Tab</title></head><body><p>text</p></body>') == {
+        'title': 'Tab', 'description': 'text'}
+    assert parse_article_metadata('<body><p>No title anywhere</p></body>') is None
+
+def test_multibyte_characters_split_across_chunks():
+    page = '<h1>Café ✓</h1><meta name="description" content="naïve">'.encode()
+    assert feed_in_chunks(page, 1).result() == {'title': 'Café ✓', 'description': 'naïve'}
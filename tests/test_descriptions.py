@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from descriptions import DescriptionEngine, keeps_description, phrase_index
+
+class Phrases:
+    """Stands in for maintenance_data with a fixed phrase table"""
+
+    def phrases(self, emotion):
+        return ['lifts your spirits', 'brings a smile', 'warms your heart']
+
+ENTRIES = [
+    ({'title': 'Sunny Day', 'author': 'Channel'}, 'happy', 'video'),
+    ({'title': 'Rain Song', 'artist': 'Band'}, 'sad', 'song'),
+    ({'title': 'Calm', 'description': 'Breathe slowly. Then relax.'}, 'anxious', 'article'),
+    ({'title': 'Untitled'}, 'calm', 'podcast'),
+]
+
+def test_phrase_index_is_a_fixed_function_of_the_title():
+    assert phrase_index('Calm Piano', 7) == 2
+    assert phrase_index('', 5) == 1
+    assert all(0 <= phrase_index(f"title {n}", 3) < 3 for n in range(50))
+
+def test_descriptions_are_the_same_in_every_process():
+    script = ("from descriptions import create_emotion_descriptions\n"
+              f"print(create_emotion_descriptions({ENTRIES!r}))")
+    outputs = {
+        subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       env=dict(os.environ, PYTHONHASHSEED=seed)).stdout
+        for seed in ('1', '2', '3')
+    }
+    assert len(outputs) == 1
+
+def test_templates_by_content_type():
+    engine = DescriptionEngine(Phrases())
+    phrase = ['lifts your spirits', 'brings a smile', 'warms your heart'][phrase_index('Sunny Day', 3)]
+    assert engine.describe({'title': 'Sunny Day', 'author': 'Channel'}, 'happy', 'video') == (
+        f"Sunny Day by Channel - This video {phrase} and is perfect for when you're feeling happy.")
+    assert engine.describe({'title': 'Sunny Day'}, 'happy', 'song').startswith(f"Sunny Day - This music {phrase}")
+    assert engine.describe({'title': 'Sunny Day', 'description': 'First. Second.'}, 'happy', 'article') == (
+        f"First. This article {phrase} when you're feeling happy.")
+    assert engine.describe({'title': 'Sunny Day'}, 'happy', 'article') == (
+        f"An insightful article that {phrase} when you're feeling happy.")
+
+def test_batch_matches_one_at_a_time():
+    engine = DescriptionEngine(Phrases())
+    assert engine.describe_batch(ENTRIES) == [engine.describe(*entry) for entry in ENTRIES]
+
+def test_songs_without_an_artist_keep_their_description():
+    song = {'type': 'song', 'title': 'Rain Song', 'description': 'Rain Song by Band - ...'}
+    assert keeps_description(song, {'title': 'Rain Song'})
+    assert not keeps_description(song, {'title': 'Rain Song', 'artist': 'Band'})
+    assert not keeps_description(song, {'title': 'Another Song'})
+    assert not keeps_description(dict(song, type='video'), {'title': 'Rain Song'})
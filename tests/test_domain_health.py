@@ -0,0 +1,71 @@
+import pytest
+from domain_health import (CLOSED, FAILURE_THRESHOLD, HALF_OPEN, OPEN, OPEN_SECONDS,
+                           DomainHealth, DomainUnavailable)
+
+URL = 'https://flaky.example/page'
+
+@pytest.fixture
+def health(tmp_path):
+    health = DomainHealth(str(tmp_path / 'health.sqlite3'))
+    yield health
+    health.close()
+
+def fail(health, times, url=URL):
+    for _ in range(times):
+        health.record(url, 503)
+
+def expire(health, url=URL):
+    """Pretend the circuit was opened OPEN_SECONDS ago"""
+    health._get('flaky.example').opened_at -= OPEN_SECONDS
+
+def test_consecutive_failures_open_the_circuit(health):
+    fail(health, FAILURE_THRESHOLD - 1)
+    assert health.state(URL) == CLOSED
+    fail(health, 1)
+    assert health.state(URL) == OPEN
+    with pytest.raises(DomainUnavailable):
+        health.check(URL)
+
+def test_page_errors_do_not_count_against_the_host(health):
+    for _ in range(FAILURE_THRESHOLD * 2):
+        health.record(URL, 404)
+    assert health.state(URL) == CLOSED
+
+def test_success_resets_the_failure_streak(health):
+    fail(health, FAILURE_THRESHOLD - 1)
+    health.record(URL, 200)
+    fail(health, FAILURE_THRESHOLD - 1)
+    assert health.state(URL) == CLOSED
+
+def test_other_domains_are_unaffected(health):
+    fail(health, FAILURE_THRESHOLD)
+    assert health.allow('https://healthy.example/')
+
+def test_half_open_allows_one_trial_then_closes_on_success(health):
+    fail(health, FAILURE_THRESHOLD)
+    expire(health)
+    assert health.allow(URL)
+    assert health.state(URL) == HALF_OPEN
+    assert not health.allow(URL)
+    health.record(URL, 200)
+    assert health.state(URL) == CLOSED
+
+def test_failed_trial_reopens(health):
+    fail(health, FAILURE_THRESHOLD)
+    expire(health)
+    assert health.allow(URL)
+    fail(health, 1)
+    assert health.state(URL) == OPEN
+    assert not health.allow(URL)
+
+def test_state_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'health.sqlite3')
+    health = DomainHealth(path)
+    fail(health, FAILURE_THRESHOLD)
+    health.close()
+
+    reopened = DomainHealth(path)
+    assert reopened.state(URL) == OPEN
+    reopened.reset('flaky.example')
+    assert reopened.state(URL) == CLOSED
+    reopened.close()
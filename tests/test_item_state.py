@@ -0,0 +1,52 @@
+import sqlite3
+import pytest
+import item_state
+from item_state import ItemStateStore, content_hash
+
+ITEM = {'id': '1', 'type': 'article', 'url': 'https://example.com/a', 'title': 'Title', 'description': 'About it'}
+
+@pytest.fixture
+def store(tmp_path):
+    store = ItemStateStore(str(tmp_path / 'state.sqlite3'))
+    yield store
+    store.close()
+
+def test_hash_covers_url_title_and_description_only():
+    assert content_hash(ITEM) == content_hash(dict(ITEM, emotion='happy'))
+    for field in ('url', 'title', 'description'):
+        assert content_hash(ITEM) != content_hash(dict(ITEM, **{field: 'changed'}))
+    # Fields are separated, so text can't move between them unnoticed
+    assert content_hash(dict(ITEM, title='ab', description='c')) != content_hash(dict(ITEM, title='a', description='bc'))
+
+def test_reasons_to_check(store, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(item_state.time, 'time', lambda: now[0])
+    assert store.reason_to_check(ITEM) == 'new'
+
+    store.mark_verified(ITEM)
+    assert store.reason_to_check(ITEM, max_age=60) is None
+    assert store.reason_to_check(dict(ITEM, title='Edited'), max_age=60) == 'modified'
+
+    now[0] += 60
+    assert store.reason_to_check(ITEM, max_age=60) == 'stale'
+    # max_age=0 rechecks everything
+    assert store.reason_to_check(ITEM, max_age=0) == 'stale'
+
+def test_mark_verified_records_the_item_as_it_is_now(store):
+    store.mark_verified(ITEM)
+    edited = dict(ITEM, description='New description')
+    store.mark_verified(edited)
+    assert store.get('1')['content_hash'] == content_hash(edited)
+    assert store.reason_to_check(edited) is None
+
+def test_databases_with_the_old_validator_columns_still_work(tmp_path):
+    path = str(tmp_path / 'state.sqlite3')
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE item_state (item_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+               "last_verified REAL NOT NULL, etag TEXT, last_modified TEXT)")
+    db.commit()
+    db.close()
+    store = ItemStateStore(path)
+    store.mark_verified(ITEM)
+    assert store.reason_to_check(ITEM) is None
+    store.close()
@@ -0,0 +1,48 @@
+import pytest
+from job_journal import CHECKED, FAILED, REPLACED, JobJournal
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'journal.sqlite3')
+
+def test_records_and_reads_back_results(path):
+    journal = JobJournal('job', path=path)
+    journal.record('a', CHECKED, result={'title': 'T'}, elapsed=0.5)
+    journal.record('b', FAILED)
+    assert journal.entry('a') == {'status': CHECKED, 'result': {'title': 'T'}, 'elapsed': 0.5}
+    assert journal.completed('a')['result'] == {'title': 'T'}
+    assert journal.completed('b') is None
+    assert journal.completed('missing') is None
+    assert journal.summary() == {CHECKED: 1, FAILED: 1}
+    journal.close()
+
+def test_resume_keeps_finished_items(path):
+    journal = JobJournal('job', path=path)
+    journal.record('a', REPLACED, result={'url': 'https://example.com/new'})
+    journal.close()
+
+    resumed = JobJournal('job', path=path, resume=True)
+    assert resumed.completed('a')['result'] == {'url': 'https://example.com/new'}
+    resumed.close()
+
+def test_fresh_run_starts_empty_for_its_own_job_only(path):
+    journal = JobJournal('job', path=path)
+    journal.record('a', CHECKED)
+    other = JobJournal('other', path=path)
+    other.record('a', CHECKED)
+    journal.close()
+    other.close()
+
+    fresh = JobJournal('job', path=path)
+    assert fresh.entry('a') is None
+    fresh.close()
+    other = JobJournal('other', path=path, resume=True)
+    assert other.completed('a') is not None
+    other.close()
+
+def test_later_record_replaces_earlier(path):
+    journal = JobJournal('job', path=path)
+    journal.record('a', FAILED)
+    journal.record('a', CHECKED)
+    assert journal.summary() == {CHECKED: 1}
+    journal.close()
@@ -0,0 +1,68 @@
+from near_duplicates import MinHasher, choose_bands, find_near_duplicate_groups, jaccard, shingles
+
+def item(item_id, title, description='', content_type='article'):
+    return {'id': item_id, 'title': title, 'description': description, 'type': content_type}
+
+def test_shingles_ignore_case_and_punctuation():
+    assert shingles('Hello, World!') == shingles('hello world')
+    assert shingles('abc') == {'abc'}
+    assert shingles('') == set()
+
+def test_jaccard():
+    assert jaccard({1, 2}, {2, 3}) == 1 / 3
+    assert jaccard(set(), set()) == 0.0
+
+def test_choose_bands_fits_the_permutations():
+    bands, rows = choose_bands(128, 0.8)
+    assert bands * rows <= 128
+    assert abs((1 / bands) ** (1 / rows) - 0.8) < 0.05
+
+def test_signatures_are_deterministic_and_estimate_similarity():
+    a = shingles('ten ways to feel calmer when everything is too much')
+    b = shingles('ten ways to feel calmer when everything is too much today')
+    c = shingles('a completely unrelated piece about sourdough baking')
+    first, second = MinHasher(128), MinHasher(128)
+    assert first.signature(a) == second.signature(a)
+
+    def estimate(x, y):
+        sx, sy = first.signature(x), first.signature(y)
+        return sum(p == q for p, q in zip(sx, sy)) / len(sx)
+
+    assert abs(estimate(a, b) - jaccard(a, b)) < 0.15
+    assert estimate(a, c) < 0.1
+
+def test_empty_shingle_set_has_a_full_length_signature():
+    assert len(MinHasher(16).signature(set())) == 16
+
+def test_groups_near_identical_items_in_order():
+    items = [
+        item('1', 'How to Manage Stress at Work', 'Practical tips for a calmer workday.'),
+        item('2', 'Something else entirely', 'About gardening.'),
+        item('3', 'How to manage stress at work!', 'Practical tips for a calmer workday'),
+    ]
+    groups = find_near_duplicate_groups(items)
+    assert [[i['id'] for i in group] for group in groups] == [['1', '3']]
+
+def test_items_are_only_grouped_within_their_type():
+    items = [
+        item('1', 'Calm Piano Music', 'Relaxing piano.', 'video'),
+        item('2', 'Calm Piano Music', 'Relaxing piano.', 'song'),
+    ]
+    assert find_near_duplicate_groups(items) == []
+
+def test_shared_boilerplate_description_does_not_merge_different_titles():
+    boilerplate = 'A synthetic article suggestion for your happy mood. ' * 5
+    items = [
+        item('1', 'Gratitude journaling', boilerplate),
+        item('2', 'Sleep hygiene basics', boilerplate),
+    ]
+    assert find_near_duplicate_groups(items) == []
+
+def test_items_without_text_are_never_grouped():
+    items = [item('1', '', ''), item('2', '...', '!!'), item('3', '', '')]
+    assert find_near_duplicate_groups(items) == []
+
+def test_untitled_items_are_compared_on_their_descriptions():
+    items = [item('1', '', 'Breathing exercises for anxious moments'),
+             item('2', '', 'Breathing exercises for anxious moments.')]
+    assert len(find_near_duplicate_groups(items)) == 1
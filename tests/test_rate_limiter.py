@@ -0,0 +1,48 @@
+import pytest
+from rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+def test_burst_is_free_then_spaced_at_rate():
+    bucket = TokenBucket(rate=2, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2] == pytest.approx(0.5, abs=0.01)
+    assert waits[3] == pytest.approx(1.0, abs=0.01)
+
+def test_block_keeps_queued_callers_spaced():
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.block_for(5)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits == pytest.approx([5.0, 5.5, 6.0, 6.5], abs=0.01)
+
+def test_block_adds_existing_debt():
+    bucket = TokenBucket(rate=2, burst=2)
+    for _ in range(4):
+        bucket.reserve()
+    bucket.block_for(1)
+    # Two tokens were already owed when the block started
+    assert bucket.reserve() == pytest.approx(2.5, abs=0.01)
+
+def test_shorter_block_does_not_shorten_a_longer_one():
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.block_for(5)
+    bucket.block_for(1)
+    assert bucket.reserve() == pytest.approx(5.0, abs=0.01)
+
+def test_limiter_keeps_one_bucket_per_host():
+    limiter = RateLimiter(domain_rates={'slow.example': (1.0, 1)})
+    assert limiter.bucket('https://slow.example/a') is limiter.bucket('https://SLOW.example/b')
+    assert limiter.bucket('https://slow.example/a').rate == 1.0
+    assert limiter.bucket('https://other.example/').rate == limiter.default_rate
+
+@pytest.mark.parametrize('value, expected', [
+    (None, None),
+    ('', None),
+    ('7', 7),
+    ('100000', 120),
+    ('soon', None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+def test_parse_retry_after_http_date_in_the_past():
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
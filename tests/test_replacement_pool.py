@@ -0,0 +1,55 @@
+from catalog_index import CatalogIndex
+from replacement_pool import ReplacementPool
+
+def item(item_id, url, emotion='happy', content_type='video'):
+    return {'id': item_id, 'emotion': emotion, 'type': content_type, 'url': url, 'title': '', 'description': ''}
+
+def test_candidates_are_deduplicated_and_skip_urls_in_use():
+    index = CatalogIndex([item('1', 'https://youtu.be/used')])
+    pool = ReplacementPool({('happy', 'video'): [
+        'https://www.youtube.com/watch?v=used',
+        'https://youtu.be/a',
+        'https://www.youtube.com/watch?v=a&t=3',
+        'https://youtu.be/b',
+    ]}, index, validate=None)
+    assert pool.take('happy', 'video') == 'https://youtu.be/a'
+    assert pool.take('happy', 'video') == 'https://youtu.be/b'
+    assert pool.take('happy', 'video') is None
+
+def test_urls_used_after_the_pool_was_built_are_skipped():
+    index = CatalogIndex([item('1', 'https://example.com/old', content_type='article')])
+    pool = ReplacementPool({('happy', 'article'): ['https://example.com/a', 'https://example.com/b']},
+                           index, validate=None)
+    index.set_url(index.items_by_id['1'], 'https://example.com/a')
+    assert pool.take('happy', 'article') == 'https://example.com/b'
+
+def test_each_pair_is_validated_once_in_a_single_batch():
+    batches = []
+
+    def validate(candidates):
+        batches.append(dict(candidates))
+        return {url for url in candidates if 'dead' not in url}
+
+    pool = ReplacementPool({
+        ('happy', 'video'): ['https://youtu.be/dead1', 'https://youtu.be/live1', 'https://youtu.be/live2'],
+        ('sad', 'article'): ['https://example.com/live'],
+    }, CatalogIndex([]), validate=validate)
+    assert pool.take('happy', 'video') == 'https://youtu.be/live1'
+    assert pool.take('happy', 'video') == 'https://youtu.be/live2'
+    assert batches == [{'https://youtu.be/dead1': 'video', 'https://youtu.be/live1': 'video',
+                        'https://youtu.be/live2': 'video'}]
+
+    pool.prevalidate()
+    assert batches[1] == {'https://example.com/live': 'article'}
+    pool.take('sad', 'article')
+    assert len(batches) == 2
+
+def test_running_out_is_counted_not_invented(capsys):
+    pool = ReplacementPool({('happy', 'video'): ['https://youtu.be/a']}, CatalogIndex([]), validate=None)
+    pool.take('happy', 'video')
+    assert pool.take('happy', 'video') is None
+    assert pool.take('happy', 'video') is None
+    assert pool.take('calm', 'song') is None
+    assert pool.exhausted == {('happy', 'video'): 2, ('calm', 'song'): 1}
+    pool.report()
+    assert "for happy; 2 left unreplaced" in capsys.readouterr().out
@@ -0,0 +1,127 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import domain_health
+import http_client
+import rate_limiter
+import response_cache
+from response_cache import ResponseCache, StoredResponse
+
+class Clock:
+    """Stands in for time.time(), ticking one second per call so every write is ordered"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, 'time', clock)
+    return clock
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttl_by_kind={'article': 100})
+    yield cache
+    cache.close()
+
+def response(url, body=b'body', headers=None):
+    return StoredResponse(url, 200, headers or {}, body, 0)
+
+def test_lookup_uses_the_normalized_url(cache):
+    cache.store('https://Example.com:443/a?utm_source=x#top', response('https://example.com/a'), 'article')
+    cached, kind, etag, last_modified = cache.lookup('https://example.com/a?utm_source=x')
+    assert (cached.content, cached.from_cache, kind) == (b'body', True, 'article')
+    assert cache.lookup('https://example.com/b') is None
+
+def test_entries_go_stale_after_their_kind_ttl(cache, clock):
+    cache.store('https://example.com/a', response('https://example.com/a'), 'article')
+    cached = cache.lookup('https://example.com/a')[0]
+    assert cache.is_fresh(cached, 'article')
+    clock.now += 100
+    assert not cache.is_fresh(cached, 'article')
+    # Kinds without their own TTL use the default one
+    assert cache.is_fresh(cached, 'unknown')
+
+def test_revalidation_resets_the_freshness_clock(cache, clock):
+    cache.store('https://example.com/a', response('https://example.com/a'), 'article')
+    clock.now += 100
+    cache.mark_revalidated('https://example.com/a')
+    assert cache.is_fresh(cache.lookup('https://example.com/a')[0], 'article')
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10)
+    cache.store('https://example.com/1', response('https://example.com/1', b'x' * 4))
+    cache.store('https://example.com/2', response('https://example.com/2', b'x' * 4))
+    cache.lookup('https://example.com/1')
+    cache.store('https://example.com/3', response('https://example.com/3', b'x' * 4))
+    assert cache.lookup('https://example.com/2') is None
+    assert cache.lookup('https://example.com/1') is not None
+    assert cache.lookup('https://example.com/3') is not None
+    cache.close()
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a page with an ETag, answering 304 when the client already has it"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/missing':
+            status, body = 404, b'gone'
+        elif self.headers.get('If-None-Match') == '"v1"':
+            status, body = 304, b''
+        else:
+            status, body = 200, b'<html>page</html>'
+        self.send_response(status)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    health = domain_health.DomainHealth(str(tmp_path / 'health.sqlite3'))
+    monkeypatch.setattr(domain_health, '_default_health', health)
+    monkeypatch.setattr(rate_limiter, '_default_limiter', rate_limiter.RateLimiter(default_rate=1000, default_burst=1000))
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    health.close()
+
+def test_fresh_entries_are_served_without_a_request(server, cache):
+    stand_in, base = server
+    first = http_client.fetch(f"{base}/page", kind='default', cache=cache)
+    second = http_client.fetch(f"{base}/page", kind='default', cache=cache)
+    assert first.content == second.content == b'<html>page</html>'
+    assert second.from_cache
+    assert len(stand_in.requests) == 1
+
+def test_stale_entries_are_revalidated_with_their_etag(server, cache, clock):
+    stand_in, base = server
+    http_client.fetch(f"{base}/page", kind='article', cache=cache)
+    clock.now += 100
+    revalidated = http_client.fetch(f"{base}/page", kind='article', cache=cache)
+    assert revalidated.content == b'<html>page</html>'
+    assert stand_in.requests == [('/page', None), ('/page', '"v1"')]
+    # The 304 made the entry fresh again
+    http_client.fetch(f"{base}/page", kind='article', cache=cache)
+    assert len(stand_in.requests) == 2
+
+def test_unsuccessful_responses_are_not_cached(server, cache):
+    stand_in, base = server
+    for _ in range(2):
+        assert http_client.fetch(f"{base}/missing", cache=cache).status_code == 404
+    assert len(stand_in.requests) == 2
+    assert cache.lookup(f"{base}/missing") is None
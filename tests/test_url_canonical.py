@@ -0,0 +1,72 @@
+import pytest
+from url_canonical import (canonicalize_url, fingerprint, get_spotify_track_id, get_youtube_video_id,
+                           normalize_url, url_identity)
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=abc123',
+    'https://youtube.com/watch?feature=share&v=abc123',
+    'https://m.youtube.com/watch?v=abc123#t=30',
+    'https://youtu.be/abc123?si=xyz',
+    'https://www.youtube.com/embed/abc123',
+    'https://www.youtube.com/v/abc123?version=3',
+])
+def test_youtube_forms_share_one_identity(url):
+    assert get_youtube_video_id(url) == 'abc123'
+    assert canonicalize_url(url) == 'https://www.youtube.com/watch?v=abc123'
+    assert url_identity(url) == 'yt:abc123'
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/search?next=https://youtu.be/abc123',
+    'https://example.com/youtube.com/watch?v=abc123',
+    'https://notyoutube.com/watch?v=abc123',
+    'https://www.youtube.com/channel/abc123',
+    'https://www.youtube.com/watch',
+])
+def test_youtube_ids_only_come_from_youtube_urls(url):
+    assert get_youtube_video_id(url) is None
+    assert not url_identity(url).startswith('yt:')
+
+@pytest.mark.parametrize('url', [
+    'https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC',
+    'https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC?si=abc',
+    'https://open.spotify.com/intl-de/track/4uLU6hMCjMI75M1A2tKUQC',
+])
+def test_spotify_forms_share_one_identity(url):
+    assert get_spotify_track_id(url) == '4uLU6hMCjMI75M1A2tKUQC'
+    assert canonicalize_url(url) == 'https://open.spotify.com/track/4uLU6hMCjMI75M1A2tKUQC'
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/open.spotify.com/track/abc',
+    'https://example.com/?u=https://open.spotify.com/track/abc',
+    'https://open.spotify.com/album/abc',
+])
+def test_spotify_ids_only_come_from_track_urls(url):
+    assert get_spotify_track_id(url) is None
+
+@pytest.mark.parametrize('url', [
+    'http://Example.com/article/',
+    'https://example.com/article?utm_source=x&utm_medium=y',
+    'https://example.com:443/article?fbclid=1#section',
+    'https://EXAMPLE.com/article?dup=2',
+])
+def test_article_variants_canonicalize_together(url):
+    assert canonicalize_url(url) == 'https://example.com/article'
+    assert fingerprint(url) == fingerprint('https://example.com/article')
+
+def test_meaningful_query_parameters_are_kept_and_sorted():
+    assert canonicalize_url('https://example.com/a?b=2&a=1&ref=x') == 'https://example.com/a?a=1&b=2'
+    assert fingerprint('https://example.com/a?id=1') != fingerprint('https://example.com/a?id=2')
+
+def test_non_default_port_is_kept():
+    assert canonicalize_url('https://example.com:8443/a') == 'https://example.com:8443/a'
+
+@pytest.mark.parametrize('url', ['http://[::1', 'https://example.com:99999/a', ' http://[::1 '])
+def test_malformed_urls_fall_back_to_the_stripped_string(url):
+    assert canonicalize_url(url) == url.strip()
+    assert normalize_url(url) == url.strip()
+    assert get_youtube_video_id(url) is None
+    assert fingerprint(url) == fingerprint(url.strip())
+
+def test_normalize_url_keeps_what_a_server_could_answer_differently():
+    assert normalize_url('HTTPS://Example.com:443/A/?utm_source=x&b=1#top') == 'https://example.com/A/?b=1&utm_source=x'
+    assert normalize_url('http://example.com') == 'http://example.com/'
@@ -0,0 +1,103 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import domain_health
+import rate_limiter
+from url_checker import check_url_liveness, is_broken, is_skipped
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers like the content sites the checker probes, by path"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self, send_body):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            time.sleep(0.02)
+            if self.path == '/no-head' and not send_body:
+                status = 405
+            elif self.path == '/moved':
+                self.send_response(301)
+                self.send_header('Location', '/ok')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            elif self.path in ('/ok', '/no-head') or self.path.startswith('/page/'):
+                status = 200
+            else:
+                status = 404
+            body = b'<html></html>'
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def do_HEAD(self):
+        self._answer(send_body=False)
+
+    def do_GET(self):
+        self._answer(send_body=True)
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(autouse=True)
+def isolated_clients(tmp_path, monkeypatch):
+    """Fresh circuit breakers in a temp dir and rate limits that don't slow the tests"""
+    health = domain_health.DomainHealth(str(tmp_path / 'health.sqlite3'))
+    monkeypatch.setattr(domain_health, '_default_health', health)
+    monkeypatch.setattr(rate_limiter, '_default_limiter', rate_limiter.RateLimiter(default_rate=1000, default_burst=1000))
+    yield health
+    health.close()
+
+def test_statuses_are_classified(server):
+    _, base = server
+    results = check_url_liveness([f"{base}/ok", f"{base}/missing", f"{base}/no-head", f"{base}/moved"])
+    assert results[f"{base}/ok"] == (200, None)
+    assert is_broken(results[f"{base}/missing"])
+    # HEAD refused, GET fallback succeeds
+    assert results[f"{base}/no-head"] == (200, None)
+    assert results[f"{base}/moved"] == (200, None)
+
+def test_each_url_is_probed_once(server):
+    _, base = server
+    seen = []
+    results = check_url_liveness([f"{base}/ok"] * 5, on_result=lambda url, *_: seen.append(url))
+    assert list(results) == [f"{base}/ok"]
+    assert seen == [f"{base}/ok"]
+
+def test_per_host_limit_is_respected(server):
+    stand_in, base = server
+    urls = [f"{base}/page/{n}" for n in range(12)]
+    results = check_url_liveness(urls, concurrency=10, per_host=2)
+    assert all(result == (200, None) for result in results.values())
+    assert stand_in.max_in_flight <= 2
+
+def test_open_circuit_skips_instead_of_breaking(server, isolated_clients):
+    _, base = server
+    for _ in range(domain_health.FAILURE_THRESHOLD):
+        isolated_clients.record(f"{base}/ok", 503)
+    result = check_url_liveness([f"{base}/ok"])[f"{base}/ok"]
+    assert is_skipped(result)
+    assert not is_broken(result)
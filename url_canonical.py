@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Paths on youtube.com other than /watch that carry the video ID
+YOUTUBE_PATH_PATTERN = re.compile(r'^/(?:embed|v)/([^/]+)')
+
+# Path of a track on open.spotify.com, optionally under a locale
+SPOTIFY_TRACK_PATTERN = re.compile(r'^/(?:intl-[a-z]{2}/)?track/([A-Za-z0-9]+)')
+
+# Query parameters that never change what a URL points to
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'si', 'feature',
+    # Marker appended by older dedup runs to make fake URL variants
+    'dup',
+}
+TRACKING_PREFIXES = ('utm_',)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def _split(url):
+    """Return (parts, lowercase host) of a URL, or (None, '') if it can't be parsed"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None, ''
+    return parts, (parts.hostname or '').lower()
+
+def _netloc_parts(url):
+    """Return (parts, lowercase scheme, host[:port] without a default port), or None if malformed"""
+    parts, host = _split(url)
+    if parts is None:
+        return None
+    scheme = parts.scheme.lower()
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return parts, scheme, host
+
+def _on_domain(host, domain):
+    return host == domain or host.endswith('.' + domain)
+
+def get_youtube_video_id(url):
+    """Extract the video ID from a youtube.com or youtu.be URL"""
+    parts, host = _split(url)
+    if _on_domain(host, 'youtu.be'):
+        video_id = parts.path.lstrip('/').split('/')[0]
+    elif _on_domain(host, 'youtube.com'):
+        if parts.path.rstrip('/') == '/watch':
+            video_id = dict(parse_qsl(parts.query)).get('v', '')
+        else:
+            match = YOUTUBE_PATH_PATTERN.match(parts.path)
+            video_id = match.group(1) if match else ''
+    else:
+        return None
+    return video_id or None
+
+def get_spotify_track_id(url):
+    """Extract the track ID from an open.spotify.com URL"""
+    parts, host = _split(url)
+    if host != 'open.spotify.com':
+        return None
+    match = SPOTIFY_TRACK_PATTERN.match(parts.path)
+    return match.group(1) if match else None
+
+def _is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def canonicalize_url(url):
+    """Return one canonical spelling for every URL that points at the same content"""
+    video_id = get_youtube_video_id(url)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    track_id = get_spotify_track_id(url)
+    if track_id:
+        return f"https://open.spotify.com/track/{track_id}"
+
+    split = _netloc_parts(url)
+    if split is None:
+        # Malformed; it can still be compared with itself
+        return url.strip()
+    parts, scheme, host = split
+    if scheme == 'http':
+        scheme = 'https'
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ''))
+
+def normalize_url(url):
+    """Return a URL with its scheme and host lowercased, default port, fragment dropped and query sorted
+
+    Unlike canonicalize_url this never merges URLs a server could answer
+    differently, so it is what the response cache keys on. Malformed URLs
+    come back stripped.
+    """
+    split = _netloc_parts(url)
+    if split is None:
+        return url.strip()
+    parts, scheme, host = split
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+def url_identity(url):
+    """Return a short readable identity: yt:<id>, spotify:<id> or the canonical URL"""
+    video_id = get_youtube_video_id(url)
+    if video_id:
+        return f"yt:{video_id}"
+    track_id = get_spotify_track_id(url)
+    if track_id:
+        return f"spotify:{track_id}"
+    return canonicalize_url(url)
+
+def fingerprint(url):
+    """Return a compact 64-bit hex fingerprint of a URL's canonical identity"""
+    return hashlib.blake2b(url_identity(url).encode('utf-8'), digest_size=8).hexdigest()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+import asyncio
+import requests
+import http_client
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from domain_health import DomainUnavailable
+from instrumentation import stage
+from urllib.parse import urlparse
+
+# Total number of probes in flight at once
+DEFAULT_CONCURRENCY = 20
+
+# Number of probes in flight against any single host
+DEFAULT_PER_HOST = 2
+
+def probe_url(url, timeout=10):
+    """Return (status_code, error) for a URL using HEAD with a GET fallback"""
+    try:
+        # Use head request to avoid downloading large content
+        response = http_client.head(url, timeout=timeout, allow_redirects=True)
+
+        # Some sites block head requests, try GET if head fails
+        if response.status_code >= 400:
+            response = http_client.get(url, timeout=timeout, stream=True)
+            # Just check the status and close the connection
+            response.close()
+
+        return response.status_code, None
+    except requests.exceptions.RequestException as e:
+        return None, e
+
+def is_skipped(result):
+    """Return True if a URL wasn't checked because its whole domain is down"""
+    return isinstance(result[1], DomainUnavailable)
+
+def is_broken(result):
+    """Return True if a probe result means the URL should be replaced
+
+    URLs skipped because their domain's circuit is open are not broken;
+    they are simply unknown until the domain recovers.
+    """
+    status, error = result
+    if is_skipped(result):
+        return False
+    return error is not None or status >= 400
+
+async def check_urls_async(urls, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                           probe=probe_url, on_result=None):
+    """Probe URLs concurrently and return a map of url -> (status_code, error)
+
+    Each distinct URL is probed once. At most `concurrency` probes run at a
+    time overall and at most `per_host` against the same netloc; request
+    pacing per host is left to the shared rate limiter in http_client.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+
+    loop = asyncio.get_running_loop()
+    global_slots = asyncio.Semaphore(concurrency)
+    host_slots = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def check_one(url, executor):
+        # Wait for a host slot first so a busy host never holds global slots
+        async with host_slots[urlparse(url).netloc]:
+            async with global_slots:
+                result = await loop.run_in_executor(executor, probe, url)
+        return url, result
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        tasks = [check_one(url, executor) for url in unique_urls]
+        for next_done in asyncio.as_completed(tasks):
+            url, result = await next_done
+            results[url] = result
+            if on_result:
+                on_result(url, result, len(results), len(unique_urls))
+
+    return results
+
+@stage('fetch')
+def check_url_liveness(urls, **kwargs):
+    """Synchronous wrapper around check_urls_async"""
+    return asyncio.run(check_urls_async(urls, **kwargs))